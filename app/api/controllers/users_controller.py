@@ -1,51 +1,172 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from typing import List, Optional
+import asyncio
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Form
 from PIL import Image
+from app.config import (
+    ENROLLMENT_JOBS,
+    ENROLLMENT_MAX_QUEUE,
+    INFERENCE_MAX_QUEUE,
+    INFERENCE_WORKERS,
+    MODEL_WARMUP,
+)
+from app.dependencies import get_user_service, warmup
+from app.exceptions import ServiceOverloadedError, StoreUnavailableError
+from app.factory import registry
 from app.service.user_service import UserService
+from app.utils.concurrency_utils import BoundedExecutor
 import io
+import os
+import zipfile
 
 router = APIRouter()
-user_service = UserService()
+inference_pool = BoundedExecutor(INFERENCE_WORKERS, INFERENCE_MAX_QUEUE)
+# Bulk enrollments are long-running, so they get their own pool instead of
+# holding per-request inference workers for their whole duration
+enrollment_pool = BoundedExecutor(ENROLLMENT_JOBS, ENROLLMENT_MAX_QUEUE, name="enrollment")
 
 
-@router.post("/add_employee/")
-async def add_employee(name: str = Form(...), file: UploadFile = File(...)):
+def _decode_image(data: bytes) -> Image.Image:
     """
-    Add a new employee's embedding to the Milvus database.
+    Decode uploaded bytes into an RGB image.
     """
     try:
-        image = Image.open(io.BytesIO(await file.read())).convert("RGB")
+        return Image.open(io.BytesIO(data)).convert("RGB")
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid image file")
-    message = user_service.add_employee(name, image)
+
+
+async def _run_inference(fn, *args, pool=inference_pool):
+    """
+    Run a blocking service call on the inference pool (or `pool`), mapping
+    overload (or an unreachable employee database) to 503.
+    """
+    try:
+        return await pool.run(fn, *args)
+    except (ServiceOverloadedError, StoreUnavailableError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.on_event("startup")
+async def start_warmup():
+    """
+    Load models in the background so the server accepts traffic immediately;
+    /ready reports when warmup has finished. Without warmup, models load on
+    first use and the server is ready at once.
+    """
+    if MODEL_WARMUP:
+        asyncio.get_running_loop().run_in_executor(None, warmup)
+    else:
+        registry.ready = True
+
+
+@router.get("/ready")
+def ready():
+    """
+    Readiness probe: 503 until the models are loaded and warmed up, or if
+    warmup failed.
+    """
+    if registry.error is not None:
+        raise HTTPException(
+            status_code=503, detail=f"Model warmup failed: {registry.error}"
+        )
+    if not registry.ready:
+        raise HTTPException(status_code=503, detail="Models are still loading")
+    return {"ready": True}
+
+
+@router.post("/add_employee/")
+async def add_employee(
+    name: str = Form(...),
+    file: UploadFile = File(...),
+    user_service: UserService = Depends(get_user_service),
+):
+    """
+    Add a new employee's embedding to the Milvus database.
+    """
+    data = await file.read()
+    image = await _run_inference(_decode_image, data)
+    message = await _run_inference(user_service.add_employee, name, image)
     return {"message": message}
 
 
+@router.post("/add_employees/")
+async def add_employees(
+    files: List[UploadFile] = File(...),
+    names: Optional[List[str]] = Form(None),
+    user_service: UserService = Depends(get_user_service),
+):
+    """
+    Add many employees at once. Names default to each file's name without extension.
+    """
+    if names is not None and len(names) != len(files):
+        raise HTTPException(status_code=400, detail="Expected one name per file")
+    if names is None:
+        names = [os.path.splitext(file.filename)[0] for file in files]
+    # Read each upload's spooled file lazily from the pipeline's decode stage
+    items = ((name, file.file.read()) for name, file in zip(names, files))
+    return await _run_inference(user_service.add_employees, items, pool=enrollment_pool)
+
+
+@router.post("/add_employees_archive/")
+async def add_employees_archive(
+    file: UploadFile = File(...), user_service: UserService = Depends(get_user_service)
+):
+    """
+    Add every employee photo in a zip archive, named by manifest.csv or file name.
+    """
+    try:
+        # Stream entries straight from the upload's spooled temporary file
+        return await _run_inference(
+            user_service.add_employees_from_archive, file.file, pool=enrollment_pool
+        )
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Invalid zip archive")
+
+
 @router.get("/list_employees/")
-async def list_employees():
+def list_employees(user_service: UserService = Depends(get_user_service)):
     """
     List all employees in the database.
     """
-    employees = user_service.list_employees()
+    try:
+        employees = user_service.list_employees()
+    except StoreUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     return {"employees": employees}
 
 
 @router.delete("/delete_employee/{name}")
-async def delete_employee(name: str):
+def delete_employee(name: str, user_service: UserService = Depends(get_user_service)):
     """
     Delete an employee from the database by name.
     """
-    message = user_service.delete_employee(name)
+    try:
+        message = user_service.delete_employee(name)
+    except StoreUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     return {"message": message}
 
 
+@router.get("/cache_stats/")
+def cache_stats(user_service: UserService = Depends(get_user_service)):
+    """
+    Embedding cache hit/miss counters.
+    """
+    return user_service.cache_stats()
+
+
 @router.post("/search_employee/")
-async def search_employee(file: UploadFile = File(...)):
+async def search_employee(
+    file: UploadFile = File(...), user_service: UserService = Depends(get_user_service)
+):
     """
     Search for an employee using an image.
     """
+    data = await file.read()
+    image = await _run_inference(_decode_image, data)
+    # Wait for the micro-batch without holding an inference worker, so
+    # batches are not capped at INFERENCE_WORKERS
     try:
-        image = Image.open(io.BytesIO(await file.read())).convert("RGB")
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid image file")
-    result = user_service.search_employee(image)
-    return result
+        return await asyncio.wrap_future(user_service.submit_search(image))
+    except (ServiceOverloadedError, StoreUnavailableError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
@@ -0,0 +1,104 @@
+import threading
+
+import numpy as np
+
+from app.face_recognition.gallery import FaceGallery
+
+try:
+    import hnswlib
+except ImportError:  # Optional: without it the local index is always flat
+    hnswlib = None
+
+
+class LocalIndex:
+    """
+    In-process mirror of the employee_faces collection.
+
+    Embeddings are always kept in a flat, normalized FaceGallery (exact
+    inner-product search with one matmul). Once the gallery reaches
+    `hnsw_min_size` and hnswlib is installed, an HNSW graph is built and
+    maintained incrementally alongside it and used for searches.
+    """
+
+    def __init__(self, dim=512, hnsw_min_size=50000, hnsw_params=None):
+        self.dim = dim
+        self.hnsw_min_size = hnsw_min_size
+        self.hnsw_params = hnsw_params or {"M": 16, "ef_construction": 200, "ef": 64}
+        self.gallery = FaceGallery(dim=dim)
+        self._hnsw = None
+        self._hnsw_labels = {}  # name -> list of HNSW labels
+        self._hnsw_names = {}  # HNSW label -> name
+        self._next_label = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.gallery)
+
+    def names(self):
+        return list(dict.fromkeys(self.gallery.names))
+
+    def replace(self, names, embeddings):
+        """
+        Replace the whole mirror, e.g. after a full sync from Milvus.
+        """
+        with self._lock:
+            self.gallery.clear()
+            self._hnsw = None
+            self._hnsw_labels = {}
+            self._hnsw_names = {}
+            self.add(names, embeddings)
+
+    def add(self, names, embeddings):
+        with self._lock:
+            self.gallery.add(names, embeddings)
+            if self._hnsw is not None:
+                self._hnsw_add(names, FaceGallery.normalize(embeddings))
+            elif hnswlib is not None and len(self.gallery) >= self.hnsw_min_size:
+                self._build_hnsw()
+
+    def remove(self, name):
+        with self._lock:
+            self.gallery.remove(name)
+            if self._hnsw is not None:
+                for label in self._hnsw_labels.pop(name, []):
+                    self._hnsw.mark_deleted(label)
+                    del self._hnsw_names[label]
+
+    def search(self, embeddings, k=1):
+        """
+        Top-k (names, scores) per probe, by cosine similarity.
+        """
+        with self._lock:
+            if self._hnsw is None:
+                indices, scores = self.gallery.search(embeddings, k=k)
+                names = [[self.gallery.names[i] for i in row] for row in indices]
+                return names, scores
+
+            probes = FaceGallery.normalize(embeddings)
+            k = min(k, len(self._hnsw_names))
+            if k == 0:
+                return [[] for _ in probes], np.empty((len(probes), 0), dtype=np.float32)
+            labels, distances = self._hnsw.knn_query(probes, k=k)
+            names = [[self._hnsw_names[label] for label in row] for row in labels]
+            return names, 1.0 - distances  # hnswlib "ip" distance is 1 - dot
+
+    def _build_hnsw(self):
+        self._hnsw = hnswlib.Index(space="ip", dim=self.dim)
+        self._hnsw.init_index(
+            max_elements=max(2 * len(self.gallery), 1024),
+            M=self.hnsw_params["M"],
+            ef_construction=self.hnsw_params["ef_construction"],
+        )
+        self._hnsw.set_ef(self.hnsw_params["ef"])
+        self._hnsw_add(self.gallery.names, self.gallery.embeddings)
+
+    def _hnsw_add(self, names, embeddings):
+        labels = np.arange(self._next_label, self._next_label + len(names))
+        self._next_label += len(names)
+        needed = self._hnsw.get_current_count() + len(names)
+        if needed > self._hnsw.get_max_elements():
+            self._hnsw.resize_index(2 * needed)
+        self._hnsw.add_items(embeddings, labels)
+        for name, label in zip(names, labels):
+            self._hnsw_labels.setdefault(name, []).append(int(label))
+            self._hnsw_names[int(label)] = name
@@ -1,20 +1,144 @@
-from pymilvus import connections, Collection, CollectionSchema, FieldSchema, DataType
+import threading
+import time
+
+from pymilvus import connections, utility, Collection, CollectionSchema, FieldSchema, DataType
+from pymilvus.exceptions import MilvusException
+from app.client.local_index import LocalIndex
+from app.config import (
+    LOCAL_INDEX_ENABLED,
+    LOCAL_INDEX_HNSW_MIN_SIZE,
+    LOCAL_INDEX_HNSW_PARAMS,
+    LOCAL_INDEX_MAX_SIZE,
+    LOCAL_INDEX_RESYNC_SECONDS,
+    LOCAL_INDEX_SERVE_SMALL,
+    MILVUS_HOST,
+    MILVUS_INDEX_PARAMS,
+    MILVUS_INDEX_TYPE,
+    MILVUS_METRIC_TYPE,
+    MILVUS_PORT,
+    MILVUS_SEARCH_PARAMS,
+    MATCH_THRESHOLD,
+    MILVUS_EXPORT_DIR,
+    MILVUS_RECONNECT_SECONDS,
+)
+from app.dao.milvus_clinet import ensure_index
+from app.exceptions import StoreUnavailableError
+from app.face_recognition.snapshot import GallerySnapshot
 
-MILVUS_HOST = "localhost"
-MILVUS_PORT = "19530"
 COLLECTION_NAME = "employee_faces"
 
 
 class UserClient:
-    def __init__(self):
-        connections.connect(alias="default", host=MILVUS_HOST, port=MILVUS_PORT)
-        self.collection = self._get_or_create_collection()
+    def __init__(
+        self,
+        index_type=MILVUS_INDEX_TYPE,
+        metric_type=MILVUS_METRIC_TYPE,
+        threshold=MATCH_THRESHOLD,
+    ):
+        if index_type not in MILVUS_INDEX_PARAMS:
+            raise ValueError(f"Unsupported index type: {index_type}")
+        self.index_type = index_type
+        self.metric_type = metric_type
+        self.threshold = threshold
+        self.search_params = {
+            "metric_type": metric_type,
+            "params": MILVUS_SEARCH_PARAMS[index_type],
+        }
+        # Mirror of the collection, searched while Milvus is down (and for
+        # small galleries with LOCAL_INDEX_SERVE_SMALL)
+        self.local_index = (
+            LocalIndex(hnsw_min_size=LOCAL_INDEX_HNSW_MIN_SIZE, hnsw_params=LOCAL_INDEX_HNSW_PARAMS)
+            if LOCAL_INDEX_ENABLED
+            else None
+        )
+        self.local_synced = False  # Whether the mirror was read from Milvus
+        self.local_seeded = False  # Whether the mirror was loaded from an export
+        self._last_sync = 0.0
+        # Swapped by reconnects and failures on other threads, so methods read
+        # it into a local once per call
+        self.collection = None
+        self._last_connect_attempt = 0.0
+        self._reconnect_lock = threading.Lock()
+        self._reconnect_thread = None
+        self._connect()
+
+    @property
+    def milvus_available(self):
+        """
+        Whether Milvus is connected. While it is not, a reconnect is started
+        in the background at most every MILVUS_RECONNECT_SECONDS.
+        """
+        return self._current_collection() is not None
+
+    def _current_collection(self):
+        collection = self.collection
+        if collection is None:
+            self._schedule_reconnect()
+        return collection
+
+    def _schedule_reconnect(self):
+        """
+        Retry the connection on a background thread so requests never wait
+        on Milvus connect timeouts.
+        """
+        with self._reconnect_lock:
+            if self._reconnect_thread is not None and self._reconnect_thread.is_alive():
+                return
+            if time.monotonic() - self._last_connect_attempt < MILVUS_RECONNECT_SECONDS:
+                return
+            self._last_connect_attempt = time.monotonic()
+            self._reconnect_thread = threading.Thread(
+                target=self._connect, name="milvus-reconnect", daemon=True
+            )
+            self._reconnect_thread.start()
+
+    def _connect(self):
+        """
+        Connect to Milvus and load the collection, then mirror it locally.
+        Failures leave the client in local-only mode instead of raising.
+        """
+        self._last_connect_attempt = time.monotonic()
+        try:
+            connections.connect(alias="default", host=MILVUS_HOST, port=MILVUS_PORT)
+            collection = self._get_or_create_collection()
+            self._ensure_index(collection)
+            collection.load()  # Searches need the collection in memory
+        except MilvusException as e:
+            print(f"Milvus unavailable, serving searches locally: {e}")
+            if not (self.local_synced or self.local_seeded):
+                self._seed_local_index()
+            return
+        # Only publish the collection once it is ready to search
+        self.collection = collection
+        self._sync_local_index(collection)
+
+    def _mark_unavailable(self, error, collection):
+        print(f"Lost connection to Milvus, serving searches locally: {error}")
+        # Keep a collection a concurrent reconnect has already replaced it with
+        if self.collection is collection:
+            self.collection = None
+        self._last_connect_attempt = time.monotonic()
+
+    def _sync_local_index(self, collection):
+        """
+        Copy every stored embedding into the local index.
+        """
+        if self.local_index is None:
+            return
+        try:
+            names, embeddings = self._fetch_all(collection)
+        except MilvusException as e:
+            print(f"Failed to mirror Milvus locally: {e}")
+            return
+        self.local_index.replace(names, embeddings)
+        self.local_synced = True
+        self._last_sync = time.monotonic()
 
     def _get_or_create_collection(self):
         """
         Get or create the Milvus collection for storing employee embeddings.
         """
-        if COLLECTION_NAME not in [col.name for col in Collection.list()]:
+        if not utility.has_collection(COLLECTION_NAME):
             fields = [
                 FieldSchema(
                     name="name", dtype=DataType.VARCHAR, max_length=100, is_primary=True
@@ -25,39 +149,199 @@ class UserClient:
             return Collection(name=COLLECTION_NAME, schema=schema)
         return Collection(COLLECTION_NAME)
 
+    def _ensure_index(self, collection):
+        """
+        Build the configured ANN index on the embedding field, replacing an
+        existing index whose type or metric no longer matches the config.
+        """
+        ensure_index(collection, self.index_type, self.metric_type)
+
+    def _seed_local_index(self):
+        """
+        Without Milvus, start the local index from the last export of the
+        collection (MILVUS_EXPORT_DIR) so searches can still be answered.
+        Without an export the mirror stays unusable and searches fail with
+        StoreUnavailableError rather than matching against nobody.
+        """
+        snapshot = GallerySnapshot(MILVUS_EXPORT_DIR)
+        if self.local_index is None or not snapshot.exists():
+            return
+        self.local_index.replace(*snapshot.load())
+        self.local_seeded = True
+
+    def _local_index_ready(self):
+        return self.local_index is not None and (self.local_synced or self.local_seeded)
+
+    def _fetch_all(self, collection, batch_size=1000):
+        """
+        Read every (name, embedding) pair from the collection.
+        """
+        names, embeddings = [], []
+        iterator = collection.query_iterator(
+            batch_size=batch_size, output_fields=["name", "embedding"]
+        )
+        while True:
+            batch = iterator.next()
+            if not batch:
+                break
+            names.extend(record["name"] for record in batch)
+            embeddings.extend(record["embedding"] for record in batch)
+        iterator.close()
+        return names, embeddings
+
+    def export_snapshot(self, path=MILVUS_EXPORT_DIR):
+        """
+        Write the whole collection to a gallery snapshot.
+        """
+        names, embeddings = self._fetch_all(self._require_milvus())
+        GallerySnapshot(path).save(names, embeddings)
+        return len(names)
+
+    def import_snapshot(self, path=MILVUS_EXPORT_DIR, chunk_size=1000):
+        """
+        Insert every row of a gallery snapshot into the collection.
+        """
+        names, embeddings = GallerySnapshot(path).load()
+        for start in range(0, len(names), chunk_size):
+            self.insert_employees(
+                names[start : start + chunk_size],
+                embeddings[start : start + chunk_size].tolist(),
+            )
+        return len(names)
+
     def insert_employee(self, name: str, embedding: list):
         """
         Insert an employee's embedding into Milvus.
         """
-        self.collection.insert([[name], [embedding]])
+        self.insert_employees([name], [embedding])
+
+    def insert_employees(self, names: list, embeddings: list):
+        """
+        Insert several employees' embeddings into Milvus in one request.
+        """
+        collection = self._require_milvus()
+        try:
+            collection.insert([names, embeddings])
+        except MilvusException as e:
+            self._mark_unavailable(e, collection)
+            raise StoreUnavailableError("Employee database is unavailable") from e
+        if self.local_index is not None and len(names):
+            self.local_index.add(list(names), embeddings)
 
     def list_employees(self):
         """
         List all employees stored in Milvus.
         """
-        result = self.collection.query(expr=None, output_fields=["name"])
-        return [record["name"] for record in result]
+        collection = self._current_collection()
+        if collection is not None:
+            try:
+                result = collection.query(expr=None, output_fields=["name"])
+                return [record["name"] for record in result]
+            except MilvusException as e:
+                self._mark_unavailable(e, collection)
+        if not self._local_index_ready():
+            raise StoreUnavailableError("Employee database is unavailable")
+        return self.local_index.names()
 
     def delete_employee(self, name: str):
         """
         Delete an employee from Milvus by name.
         """
-        self.collection.delete(expr=f"name == '{name}'")
+        collection = self._require_milvus()
+        try:
+            collection.delete(expr=f"name == '{name}'")
+        except MilvusException as e:
+            self._mark_unavailable(e, collection)
+            raise StoreUnavailableError("Employee database is unavailable") from e
+        if self.local_index is not None:
+            self.local_index.remove(name)
+
+    def _require_milvus(self):
+        """
+        Writes go to Milvus first so the local mirror never gets ahead of it.
+        Returns the connected collection.
+        """
+        collection = self._current_collection()
+        if collection is None:
+            raise StoreUnavailableError("Employee database is unavailable")
+        return collection
 
     def search_employee(self, embedding: list, limit=1):
         """
         Search for an employee by embedding in the database.
         """
-        results = self.collection.search(
-            data=[embedding],
-            anns_field="embedding",
-            param={"metric_type": "L2", "params": {"nprobe": 10}},
-            limit=limit,
-        )
-        if results and results[0]:
-            closest_match = results[0][0]
-            return {
-                "name": closest_match.entity.get("name", "Unknown"),
-                "distance": closest_match.distance,
-            }
-        return {"name": "Unknown", "distance": None}
+        return self.search_employees([embedding], limit=limit)[0]
+
+    def search_employees(self, embeddings: list, limit=1):
+        """
+        Search for the closest employee to each embedding in one Milvus request.
+
+        With the IP/COSINE metrics "distance" is the similarity score, and
+        matches scoring at or below the threshold are reported as "Unknown".
+        While Milvus is unreachable (and for small galleries with
+        LOCAL_INDEX_SERVE_SMALL) the local index is searched instead, if it
+        was mirrored from Milvus or seeded from an export; otherwise
+        StoreUnavailableError is raised.
+        """
+        collection = self._current_collection()
+        if collection is None or self._serve_small_locally(collection):
+            return self._search_local(embeddings, limit)
+        try:
+            results = collection.search(
+                data=embeddings,
+                anns_field="embedding",
+                param=self.search_params,
+                limit=limit,
+                output_fields=["name"],
+            )
+        except MilvusException as e:
+            self._mark_unavailable(e, collection)
+            if not self._local_index_ready():
+                raise StoreUnavailableError("Employee database is unavailable") from e
+            return self._search_local(embeddings, limit)
+        matches = []
+        for hits in results:
+            if hits:
+                closest_match = hits[0]
+                name = closest_match.entity.get("name", "Unknown")
+                if not self._is_match(closest_match.distance):
+                    name = "Unknown"
+                matches.append({"name": name, "distance": closest_match.distance})
+            else:
+                matches.append({"name": "Unknown", "distance": None})
+        return matches
+
+    def _serve_small_locally(self, collection):
+        if self.local_index is None or not LOCAL_INDEX_SERVE_SMALL:
+            return False
+        # Pick up writes made by other workers or nodes
+        if time.monotonic() - self._last_sync >= LOCAL_INDEX_RESYNC_SECONDS:
+            self._sync_local_index(collection)
+        return self.local_synced and len(self.local_index) <= LOCAL_INDEX_MAX_SIZE
+
+    def _search_local(self, embeddings, limit=1):
+        """
+        Same result format as the Milvus path. Local scores are cosine
+        similarities, so they are compared to the threshold directly.
+        """
+        if not self._local_index_ready():
+            raise StoreUnavailableError("Employee database is unavailable")
+        names, scores = self.local_index.search(embeddings, k=limit)
+        matches = []
+        for row_names, row_scores in zip(names, scores):
+            if len(row_names):
+                score = float(row_scores[0])
+                name = row_names[0] if score > self.threshold else "Unknown"
+                matches.append({"name": name, "distance": score})
+            else:
+                matches.append({"name": "Unknown", "distance": None})
+        return matches
+
+    def _is_match(self, distance):
+        """
+        Whether a search hit is close enough to count as the same person.
+        """
+        if self.metric_type in ("IP", "COSINE"):
+            return distance > self.threshold
+        # For L2 on normalized vectors, squared distance = 2 - 2 * cosine
+        return distance < 2.0 - 2.0 * self.threshold
@@ -1,5 +1,141 @@
 # config.py
+import os
+
 MILVUS_HOST = "localhost"
 MILVUS_PORT = "19530"
+
+# ANN index on the employee_faces collection
+MILVUS_INDEX_TYPE = "IVF_FLAT"  # One of IVF_FLAT, IVF_SQ8, HNSW
+MILVUS_METRIC_TYPE = "IP"  # Embeddings are L2-normalized, so IP == cosine
+MILVUS_INDEX_PARAMS = {
+    "IVF_FLAT": {"nlist": 1024},
+    "IVF_SQ8": {"nlist": 1024},
+    "HNSW": {"M": 16, "efConstruction": 200},
+}
+MILVUS_SEARCH_PARAMS = {
+    "IVF_FLAT": {"nprobe": 16},
+    "IVF_SQ8": {"nprobe": 16},
+    "HNSW": {"ef": 64},
+}
 # DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 # FACE_RECOGNITION_MODEL = "casia-webface"  # No need for a path if using pre-trained models
+
+# Face matching: minimum cosine similarity (inner product of normalized
+# embeddings) for a match, shared by the local gallery and Milvus searches.
+# 0.5 is an uncalibrated placeholder carried over from the original sklearn
+# cosine check; calibrate it for the deployed detector, alignment and
+# embedder with python -m app.face_recognition.calibration <labelled dir>
+# and set the MATCH_THRESHOLD environment variable to the printed value.
+MATCH_THRESHOLD = float(os.getenv("MATCH_THRESHOLD", "0.5"))
+
+# Model artifacts: looked up in MODEL_CACHE_DIR first, then the files bundled
+# in app/models. Downloads and exports are written to MODEL_CACHE_DIR only, so
+# the source tree is never modified. Set MODEL_ALLOW_DOWNLOAD=0 on air-gapped nodes.
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR") or os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "productivity_monitoring",
+    "models",
+)
+MODEL_ALLOW_DOWNLOAD = os.getenv("MODEL_ALLOW_DOWNLOAD", "1") == "1"
+MODEL_USE_SERIALIZED = True  # Prefer TorchScript / SavedModel exports when present
+# Expected sha256 per artifact file; a "<file>.sha256" sidecar is used otherwise
+MODEL_CHECKSUMS = {}
+
+# Inference backends: "torch" / "tensorflow" run the native models, "onnx"
+# runs the exported graphs (see app.models.artifacts) with ONNX Runtime and
+# "onnx_int8" runs the quantized embedder (see app.face_recognition.quantization)
+EMBEDDING_BACKEND = "torch"
+# ONNX deployments also run RetinaFace from its ONNX export, so together with
+# the retinaface detector below neither PyTorch nor TensorFlow is imported
+RETINAFACE_BACKEND = "onnx" if EMBEDDING_BACKEND.startswith("onnx") else "tensorflow"
+ONNX_INTRA_OP_THREADS = 0  # 0 lets ONNX Runtime pick
+ONNX_INTER_OP_THREADS = 0
+
+# RetinaFace batched inference: letterbox buckets as (height, width)
+RETINAFACE_BUCKETS = ((320, 320), (480, 640), (640, 640), (720, 1280), (1080, 1920))
+RETINAFACE_BATCH_SIZE = 8
+RETINAFACE_THRESHOLD = 0.9
+RETINAFACE_XLA = False  # Compile each bucket's graph with XLA
+
+# Load models in the background at API startup (see /ready)
+MODEL_WARMUP = True
+
+# Inference worker pool used by the API controllers
+INFERENCE_WORKERS = 4  # Concurrent model calls
+INFERENCE_MAX_QUEUE = 16  # Requests allowed to wait for a worker before 503
+
+# Micro-batching of concurrent search_employee calls
+SEARCH_BATCH_SIZE = 16  # Max images coalesced into one embedding/search call
+SEARCH_BATCH_WAIT_MS = 5  # Max time the first request waits for others to join
+SEARCH_MAX_QUEUE = 64  # Searches allowed to wait for a batch before 503
+
+# Bulk enrollment pipeline
+ENROLLMENT_DECODE_WORKERS = 4  # Threads decoding uploaded images
+ENROLLMENT_BATCH_SIZE = 32  # Faces per embedding forward pass
+ENROLLMENT_INSERT_CHUNK = 256  # Rows per Milvus insert
+ENROLLMENT_QUEUE_SIZE = 64  # Max items buffered between pipeline stages
+ENROLLMENT_JOBS = 1  # Bulk enrollments run at once, outside the inference pool
+ENROLLMENT_MAX_QUEUE = 4  # Bulk enrollments allowed to wait before 503
+
+# Realtime face tracking: identity is computed once per track and re-verified
+# every TRACK_REVERIFY_INTERVAL frames, or sooner when confidence is low
+TRACK_IOU_THRESHOLD = 0.3  # Min IoU to associate a detection with a track
+TRACK_MAX_MISSED = 10  # Frames a track survives without a detection
+TRACK_REVERIFY_INTERVAL = 30
+TRACK_MIN_CONFIDENCE = 0.6  # Known identities below this are re-verified sooner
+TRACK_LOW_CONFIDENCE_INTERVAL = 5
+
+# Align faces to a five-point template before embedding
+FACE_ALIGNMENT = True
+
+# Cache of face embeddings keyed by decoded image content, for re-uploads
+EMBEDDING_CACHE_ENTRIES = 4096
+EMBEDDING_CACHE_BYTES = 32 * 1024 * 1024
+EMBEDDING_CACHE_TTL_SECONDS = 600
+
+# In-process mirror of the Milvus collection, used when Milvus is unreachable
+# and to serve small galleries without a network round trip
+LOCAL_INDEX_ENABLED = True
+# Opt in to searching small galleries locally while Milvus is up. The mirror
+# only sees this process's writes, so it is re-read from Milvus at most
+# LOCAL_INDEX_RESYNC_SECONDS old; leave off when several workers or nodes write
+LOCAL_INDEX_SERVE_SMALL = False
+LOCAL_INDEX_MAX_SIZE = 5000  # Galleries up to this size are searched locally
+LOCAL_INDEX_RESYNC_SECONDS = 30
+LOCAL_INDEX_HNSW_MIN_SIZE = 50000  # Build an HNSW graph (if hnswlib is installed)
+LOCAL_INDEX_HNSW_PARAMS = {"M": 16, "ef_construction": 200, "ef": 64}
+MILVUS_RECONNECT_SECONDS = 30  # Min delay between background reconnect attempts
+
+# Face gallery snapshots (memory-mapped embeddings + names), see GallerySnapshot.
+# Kept in the user's data dir, like MODEL_CACHE_DIR, never in the source tree
+DATA_DIR = os.path.join(
+    os.getenv("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"),
+    "productivity_monitoring",
+)
+# Known faces of the realtime monitor (app.main)
+GALLERY_SNAPSHOT_DIR = os.getenv("GALLERY_SNAPSHOT_DIR") or os.path.join(DATA_DIR, "gallery")
+# Export of the Milvus collection (python -m app.face_recognition.snapshot export);
+# seeds the local index when Milvus is down at startup
+MILVUS_EXPORT_DIR = os.getenv("MILVUS_EXPORT_DIR") or os.path.join(DATA_DIR, "milvus_export")
+
+# Face detector used by the API service: "mtcnn", "mediapipe" or "retinaface"
+# (compare them with python -m app.face_recognition.benchmark <image dir>).
+# MTCNN needs PyTorch, so ONNX deployments default to RetinaFace.
+FACE_DETECTOR_BACKEND = "retinaface" if EMBEDDING_BACKEND.startswith("onnx") else "mtcnn"
+FACE_DETECTOR_MIN_CONFIDENCE = 0.9
+
+# Detect faces on a copy downscaled so its longer side is at most this many
+# pixels, then crop faces for embedding from the full-resolution image
+# (0 disables downscaling)
+DETECTION_MAX_SIZE = 640
+
+# Motion-gated scheduling of the realtime loop (see app/scheduler.py); interval
+# values are in frames
+SCHEDULER_ENABLED = True
+SCHEDULER_THUMBNAIL_SIZE = 160  # Longer side of the motion thumbnail
+MOTION_PIXEL_DELTA = 12  # Gray-level change for a thumbnail pixel to count as moving
+MOTION_THRESHOLD = 0.005  # Fraction of moving pixels that triggers FaceMesh
+SCENE_CHANGE_THRESHOLD = 0.06  # Mean difference from the last recognized frame
+RECOGNITION_MIN_INTERVAL = 5
+RECOGNITION_MAX_INTERVAL = 150
+MESH_MAX_INTERVAL = 10  # Refresh eye status at least this often on a still scene
@@ -6,16 +6,46 @@ from pymilvus import (
     DataType,
     utility,
 )
+from app.config import (
+    MILVUS_HOST,
+    MILVUS_INDEX_PARAMS,
+    MILVUS_INDEX_TYPE,
+    MILVUS_METRIC_TYPE,
+    MILVUS_PORT,
+    MILVUS_SEARCH_PARAMS,
+)
+
+
+def ensure_index(collection, index_type=MILVUS_INDEX_TYPE, metric_type=MILVUS_METRIC_TYPE):
+    """
+    Build the configured ANN index on the embedding field, replacing an
+    existing index whose type or metric no longer matches. Milvus refuses to
+    load a collection without an index, so call this before load().
+    """
+    if collection.has_index():
+        current = collection.index().params
+        if current.get("index_type") == index_type and current.get("metric_type") == metric_type:
+            return
+        collection.release()
+        collection.drop_index()
+    collection.create_index(
+        field_name="embedding",
+        index_params={
+            "index_type": index_type,
+            "metric_type": metric_type,
+            "params": MILVUS_INDEX_PARAMS[index_type],
+        },
+    )
 
 
 class MilvusClient:
     def __init__(self, collection_name):
         # Connect to Milvus
-        connections.connect(
-            "default", host="localhost", port="19530"
-        )  # Adjust host and port as needed
+        connections.connect("default", host=MILVUS_HOST, port=MILVUS_PORT)
         self.collection_name = collection_name
         self.collection = self._create_collection()
+        ensure_index(self.collection)  # Existing collections may never have been indexed
+        self.collection.load()
 
     def _create_collection(self):
         # Check if the collection already exists
@@ -49,7 +79,10 @@ class MilvusClient:
         if not isinstance(embedding, list):
             raise ValueError("Embedding should be a list vector.")
 
-        search_params = {"metric_type": "L2", "params": {"nprobe": 10}}
+        search_params = {
+            "metric_type": MILVUS_METRIC_TYPE,
+            "params": MILVUS_SEARCH_PARAMS[MILVUS_INDEX_TYPE],
+        }
         results = self.collection.search(
             [embedding], "embedding", search_params, limit=limit
         )
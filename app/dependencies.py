@@ -0,0 +1,46 @@
+import logging
+import threading
+
+from app.factory import registry
+
+logger = logging.getLogger(__name__)
+
+_user_service = None
+_user_service_lock = threading.Lock()
+
+
+def get_user_service():
+    """
+    Shared UserService for the process, created on first request.
+
+    Construction loads models, so it is serialized: concurrent first requests
+    (or a request racing the startup warmup) wait for one instance instead of
+    each building their own.
+    """
+    global _user_service
+    if _user_service is None:
+        with _user_service_lock:
+            if _user_service is None:
+                from app.service.user_service import UserService
+
+                _user_service = UserService()
+    return _user_service
+
+
+def warmup():
+    """
+    Build the shared service and models and run a dummy inference so the
+    first real request doesn't pay for loading. Sets `registry.ready`, or
+    `registry.error` if loading fails.
+    """
+    try:
+        service = get_user_service()
+        # Only the configured detector backend is loaded, so ONNX deployments
+        # never import PyTorch
+        service.detector.warmup()
+        service.recognizer.warmup()
+        registry.warmup(["embedder"])
+    except Exception as e:
+        # Runs unawaited in the background, so record the failure for /ready
+        logger.exception("Model warmup failed")
+        registry.error = e
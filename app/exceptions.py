@@ -0,0 +1,10 @@
+class ServiceOverloadedError(Exception):
+    """
+    Raised when the inference pool has no room for another request.
+    """
+
+
+class StoreUnavailableError(Exception):
+    """
+    Raised when a write needs Milvus and it cannot be reached.
+    """
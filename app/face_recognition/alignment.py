@@ -0,0 +1,131 @@
+import cv2
+import numpy as np
+
+# Five-point reference (left eye, right eye, nose tip, left and right mouth
+# corners, in image coordinates) for a 112x112 crop, as used by ArcFace
+REFERENCE_LANDMARKS_112 = np.array(
+    [
+        [38.2946, 51.6963],
+        [73.5318, 51.5014],
+        [56.0252, 71.7366],
+        [41.5493, 92.3655],
+        [70.7299, 92.2041],
+    ],
+    dtype=np.float32,
+)
+
+
+def similarity_transforms(src, dst):
+    """
+    Least-squares similarity transforms (rotation, uniform scale, translation)
+    mapping each face's points onto the reference, for all faces at once.
+
+    `src` is [N, P, 2], `dst` is [P, 2]; returns [N, 2, 3] affine matrices.
+    Treating points as complex numbers, the best fit of dst ~ a * src + t is
+    a = sum(conj(src_c) * dst_c) / sum(|src_c|^2) with centered points.
+    """
+    src = np.asarray(src, dtype=np.float64)
+    src_c = src[..., 0] + 1j * src[..., 1]
+    dst_c = dst[:, 0].astype(np.float64) + 1j * dst[:, 1]
+    src_mean = src_c.mean(axis=1, keepdims=True)
+    dst_mean = dst_c.mean()
+    src_c = src_c - src_mean
+    a = (np.conj(src_c) * (dst_c - dst_mean)).sum(axis=1) / np.maximum(
+        (np.abs(src_c) ** 2).sum(axis=1), 1e-12
+    )
+    t = dst_mean - a * src_mean[:, 0]
+
+    matrices = np.empty((len(src), 2, 3), dtype=np.float32)
+    matrices[:, 0, 0] = a.real
+    matrices[:, 0, 1] = -a.imag
+    matrices[:, 0, 2] = t.real
+    matrices[:, 1, 0] = a.imag
+    matrices[:, 1, 1] = a.real
+    matrices[:, 1, 2] = t.imag
+    return matrices
+
+
+class FaceAligner:
+    """
+    Warps faces onto a canonical five-point template, ready for embedding.
+
+    Output is written into preallocated buffers that are reused (and grown as
+    needed) across calls, so the returned batch is only valid until the next
+    call to `align`.
+    """
+
+    def __init__(self, output_size=160):
+        self.output_size = output_size
+        self.reference = REFERENCE_LANDMARKS_112 * (output_size / 112.0)
+        self._crops = np.empty((0, output_size, output_size, 3), dtype=np.uint8)
+        self._batch = np.empty((0, 3, output_size, output_size), dtype=np.float32)
+
+    def _reserve(self, count):
+        if count > len(self._crops):
+            size = self.output_size
+            capacity = max(count, 2 * len(self._crops))
+            self._crops = np.empty((capacity, size, size, 3), dtype=np.uint8)
+            self._batch = np.empty((capacity, 3, size, size), dtype=np.float32)
+
+    def align(self, image, landmarks):
+        """
+        Align every face of one RGB image.
+
+        `landmarks` is [N, 5, 2] in pixel coordinates (MTCNN or RetinaFace
+        order). Returns an [N, 3, size, size] float32 batch standardized like
+        facenet-pytorch's MTCNN output ((x - 127.5) / 128).
+        """
+        landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, 5, 2)
+        count = len(landmarks)
+        self._reserve(count)
+        crops = self._crops[:count]
+        batch = self._batch[:count]
+
+        size = (self.output_size, self.output_size)
+        for crop, matrix in zip(crops, similarity_transforms(landmarks, self.reference)):
+            cv2.warpAffine(image, matrix, size, dst=crop, borderMode=cv2.BORDER_CONSTANT)
+
+        np.subtract(crops.transpose(0, 3, 1, 2), 127.5, out=batch)
+        batch /= 128.0
+        return batch
+
+
+def crop_boxes(image, boxes, size=160):
+    """
+    Crop pixel boxes [N, 4] (x1, y1, x2, y2) out of an RGB image and resize
+    them into a [N, 3, size, size] float32 batch, standardized like
+    facenet-pytorch's MTCNN output. Used when faces are not aligned.
+    """
+    height, width = image.shape[:2]
+    crops = np.empty((len(boxes), size, size, 3), dtype=np.uint8)
+    for crop, box in zip(crops, boxes):
+        x1, y1, x2, y2 = np.clip(
+            np.round(box), 0, (width - 1, height - 1, width, height)
+        ).astype(int)
+        x2, y2 = max(x2, x1 + 1), max(y2, y1 + 1)
+        crop[...] = cv2.resize(image[y1:y2, x1:x2], (size, size))
+    return (crops.transpose(0, 3, 1, 2).astype(np.float32) - 127.5) / 128.0
+
+
+def detection_scale(shape, max_size):
+    """
+    Factor (<= 1) that fits an image's longer side within `max_size` pixels;
+    1.0 when `max_size` is falsy (downscaling disabled).
+    """
+    if not max_size:
+        return 1.0
+    return min(1.0, max_size / max(shape[:2]))
+
+
+def downscale(image, max_size):
+    """
+    Copy of `image` with its longer side at most `max_size`, for running a
+    detector cheaply. Returns (image, scale); divide coordinates found on the
+    small image by `scale` to map them back.
+    """
+    scale = detection_scale(image.shape, max_size)
+    if scale == 1.0:
+        return image, scale
+    height, width = image.shape[:2]
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA), scale
@@ -0,0 +1,48 @@
+import numpy as np
+
+
+class TorchEmbedder:
+    """
+    Runs a PyTorch (or TorchScript) InceptionResnetV1 on a batch of faces.
+    """
+
+    def __init__(self, model, num_threads=0):
+        import torch
+
+        self.torch = torch
+        self.model = model
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+    def __call__(self, batch):
+        """
+        Embed a [N, 3, 160, 160] float32 batch into a [N, 512] array.
+        """
+        with self.torch.inference_mode():
+            return self.model(self.torch.as_tensor(batch)).cpu().numpy()
+
+
+class OnnxEmbedder:
+    """
+    Runs an exported InceptionResnetV1 ONNX graph with ONNX Runtime on CPU,
+    without importing PyTorch.
+    """
+
+    def __init__(self, model_path, intra_op_threads=0, inter_op_threads=0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads  # 0 lets ORT decide
+        options.inter_op_num_threads = inter_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch):
+        """
+        Embed a [N, 3, 160, 160] float32 batch into a [N, 512] array.
+        """
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return self.session.run(None, {self.input_name: batch})[0]
@@ -0,0 +1,78 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from app.face_recognition.detection import DETECTOR_BACKENDS, FaceDetector
+from app.face_recognition.quantization import IMAGE_EXTENSIONS
+
+
+def load_images(folder):
+    """
+    Load every image in a folder as an RGB uint8 array.
+    """
+    images = []
+    for filename in sorted(os.listdir(folder)):
+        if not filename.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        img = cv2.imread(os.path.join(folder, filename))
+        if img is None:
+            print(f"Failed to load image: {filename}")
+            continue
+        images.append(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+    return images
+
+
+def benchmark_detector(detector, images, batch_size=8, repeats=3):
+    """
+    Time detector.detect over `images` in batches of `batch_size`, after one
+    warmup batch. Returns throughput (images/s), per-batch latency
+    percentiles (ms) and the number of faces found per pass.
+    """
+    detector.detect(images[:batch_size])  # Load the model and compile graphs
+
+    latencies = []
+    faces = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        faces = 0
+        for offset in range(0, len(images), batch_size):
+            batch_start = time.perf_counter()
+            detections = detector.detect(images[offset : offset + batch_size])
+            latencies.append(time.perf_counter() - batch_start)
+            faces += sum(len(scores) for _, scores, _ in detections)
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000.0
+    return {
+        "backend": detector.backend,
+        "images_per_second": repeats * len(images) / elapsed,
+        "latency_p50_ms": float(np.percentile(latencies_ms, 50)),
+        "latency_p95_ms": float(np.percentile(latencies_ms, 95)),
+        "faces": faces,
+    }
+
+
+if __name__ == "__main__":
+    # python -m app.face_recognition.benchmark photos/ --backends mtcnn retinaface
+    parser = argparse.ArgumentParser(description="Compare face detector backends.")
+    parser.add_argument("image_dir", help="Folder of sample images")
+    parser.add_argument("--backends", nargs="+", choices=DETECTOR_BACKENDS, default=DETECTOR_BACKENDS)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    sample = load_images(args.image_dir)
+    if not sample:
+        raise SystemExit(f"No images found in {args.image_dir}")
+    print(f"{'backend':<12}{'img/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'faces':>8}")
+    for backend in args.backends:
+        report = benchmark_detector(
+            FaceDetector(backend=backend), sample, args.batch_size, args.repeats
+        )
+        print(
+            f"{backend:<12}{report['images_per_second']:>10.1f}{report['latency_p50_ms']:>10.1f}"
+            f"{report['latency_p95_ms']:>10.1f}{report['faces']:>8}"
+        )
@@ -0,0 +1,79 @@
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def pair_scores(embeddings, labels):
+    """
+    Cosine similarity of every pair of L2-normalized embeddings, split into
+    genuine (same label) and impostor (different label) scores.
+    """
+    labels = np.asarray(labels)
+    rows, cols = np.triu_indices(len(labels), k=1)
+    scores = (embeddings @ embeddings.T)[rows, cols]
+    same = labels[rows] == labels[cols]
+    return scores[same], scores[~same]
+
+
+def calibrate_threshold(embeddings, labels, max_false_accept_rate=1e-3):
+    """
+    Lowest match threshold whose false-accept rate on a labelled set is at
+    most `max_false_accept_rate`. A pair is accepted when its similarity
+    exceeds the threshold, as in FaceGallery.match and UserClient.
+
+    Returns a report with the threshold and the false- and true-accept
+    rates it achieves.
+    """
+    genuine, impostor = pair_scores(embeddings, labels)
+    if not len(genuine) or not len(impostor):
+        raise ValueError("Calibration needs at least two people with two photos each.")
+    # At most `allowed` impostor scores may lie strictly above the threshold
+    allowed = int(np.floor(max_false_accept_rate * len(impostor)))
+    threshold = float(np.sort(impostor)[len(impostor) - allowed - 1])
+    return {
+        "threshold": threshold,
+        "false_accept_rate": float((impostor > threshold).mean()),
+        "true_accept_rate": float((genuine > threshold).mean()),
+        "genuine_pairs": int(len(genuine)),
+        "impostor_pairs": int(len(impostor)),
+    }
+
+
+def embed_labelled_photos(recognizer, folder):
+    """
+    Embed every photo in folder/<name>/<photo> the way known faces are
+    enrolled (recognizer.load_known_faces), so the scores match production.
+    Returns (embeddings [N, 512], labels [N]).
+    """
+    import os
+
+    paths, names = [], []
+    for name in sorted(os.listdir(folder)):
+        person_dir = os.path.join(folder, name)
+        if not os.path.isdir(person_dir):
+            continue
+        for filename in sorted(os.listdir(person_dir)):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(person_dir, filename))
+                names.append(name)
+    recognizer.load_known_faces(paths, names)
+    return recognizer.gallery.embeddings, np.array(recognizer.known_names)
+
+
+if __name__ == "__main__":
+    # python -m app.face_recognition.calibration labelled/ --far 0.001
+    import argparse
+
+    from app.face_recognition.recognition import FaceRecognizer
+
+    parser = argparse.ArgumentParser(description="Calibrate MATCH_THRESHOLD on labelled photos.")
+    parser.add_argument("labelled_dir", help="Photos laid out as <name>/<photo>.jpg")
+    parser.add_argument("--far", type=float, default=1e-3, help="Target false-accept rate")
+    args = parser.parse_args()
+
+    report = calibrate_threshold(
+        *embed_labelled_photos(FaceRecognizer(), args.labelled_dir), max_false_accept_rate=args.far
+    )
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    print(f"Set MATCH_THRESHOLD={report['threshold']:.4f}")
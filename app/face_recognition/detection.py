@@ -1,50 +1,320 @@
+import threading
+
 import cv2
 import mediapipe as mp
 import numpy as np
 
+from app.config import (
+    DETECTION_MAX_SIZE,
+    FACE_ALIGNMENT,
+    FACE_DETECTOR_BACKEND,
+    FACE_DETECTOR_MIN_CONFIDENCE,
+)
+from app.face_recognition.alignment import FaceAligner, crop_boxes, detection_scale, downscale
+from app.factory import registry
+from app.utils.frame_utils import Frame, as_frame
+
+DETECTOR_BACKENDS = ("mtcnn", "mediapipe", "retinaface")
+
+# Distance between the mouth corners relative to the eyes in the five-point
+# alignment template, used to place corners around MediaPipe's mouth center
+MOUTH_TO_EYE_WIDTH = 0.83
+
+
+def eye_aspect_ratio(eyes):
+    """
+    Vectorized EAR for eye landmarks shaped [..., 2, 6, 2] (left/right eye,
+    six points p1..p6, x/y). Returns the mean of both eyes, shaped [...].
+    """
+    # (|p2 - p6| + |p3 - p5|) / (2 * |p1 - p4|) for every eye at once
+    vertical = np.linalg.norm(eyes[..., [1, 2], :] - eyes[..., [5, 4], :], axis=-1).sum(axis=-1)
+    horizontal = np.linalg.norm(eyes[..., 0, :] - eyes[..., 3, :], axis=-1)
+    return (vertical / (2.0 * horizontal)).mean(axis=-1)
+
 
 class FaceMeshDetector:
-    def __init__(self, min_detection_confidence=0.5, min_tracking_confidence=0.5):
+    def __init__(
+        self,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5,
+        max_num_faces=4,
+        detection_max_size=DETECTION_MAX_SIZE,
+    ):
+        self.detection_max_size = detection_max_size
         self.mp_face_mesh = mp.solutions.face_mesh
         self.mp_drawing = mp.solutions.drawing_utils
         self.face_mesh = self.mp_face_mesh.FaceMesh(
+            max_num_faces=max_num_faces,
             min_detection_confidence=min_detection_confidence,
             min_tracking_confidence=min_tracking_confidence,
         )
         self.LEFT_EYE_INDICES = [362, 385, 387, 263, 373, 380]
         self.RIGHT_EYE_INDICES = [33, 160, 158, 133, 153, 144]
+        self.eye_indices = np.array([self.LEFT_EYE_INDICES, self.RIGHT_EYE_INDICES])
+        self.NOSE_TIP_INDEX = 1
+        self.MOUTH_CORNER_INDICES = [61, 291]  # Subject's right, left
 
     def calculate_ear(self, landmarks, left_eye_indices, right_eye_indices):
-        left_eye = [landmarks[i] for i in left_eye_indices]
-        left_vertical = np.linalg.norm(left_eye[1] - left_eye[5]) + np.linalg.norm(
-            left_eye[2] - left_eye[4]
+        eye_indices = np.array([left_eye_indices, right_eye_indices])
+        return eye_aspect_ratio(landmarks[..., eye_indices, :])
+
+    def calculate_ears(self, landmarks):
+        """
+        EAR for landmarks shaped [..., 468, 2], e.g. [faces, 468, 2] or
+        [frames, faces, 468, 2]. Returns one EAR per face, shaped [...].
+        """
+        return eye_aspect_ratio(landmarks[..., self.eye_indices, :])
+
+    def get_landmarks(self, frame):
+        """
+        Run FaceMesh on a BGR frame (array or Frame) and return landmarks
+        shaped [faces, 468, 2] in normalized image coordinates.
+        """
+        # Landmarks are normalized, so a downscaled frame needs no mapping back
+        frame = as_frame(frame)
+        image_rgb = frame.downscaled(detection_scale(frame.shape, self.detection_max_size))
+        results = self.face_mesh.process(image_rgb)
+        if not results.multi_face_landmarks:
+            return np.empty((0, 468, 2), dtype=np.float32)
+        return np.array(
+            [
+                [(lm.x, lm.y) for lm in face_landmarks.landmark]
+                for face_landmarks in results.multi_face_landmarks
+            ],
+            dtype=np.float32,
         )
-        left_horizontal = np.linalg.norm(left_eye[0] - left_eye[3])
-        left_ear = left_vertical / (2.0 * left_horizontal)
 
-        right_eye = [landmarks[i] for i in right_eye_indices]
-        right_vertical = np.linalg.norm(right_eye[1] - right_eye[5]) + np.linalg.norm(
-            right_eye[2] - right_eye[4]
+    @staticmethod
+    def landmarks_to_boxes(landmarks, frame_shape, margin=0.0):
+        """
+        Pixel bounding boxes [faces, 4] (x1, y1, x2, y2) around each face's
+        landmarks, grown by `margin` of the box size on every side.
+        """
+        height, width = frame_shape[:2]
+        top_left = landmarks.min(axis=1)
+        bottom_right = landmarks.max(axis=1)
+        pad = (bottom_right - top_left) * margin
+        boxes = np.concatenate([top_left - pad, bottom_right + pad], axis=1)
+        boxes *= (width, height, width, height)
+        return np.clip(boxes, 0, (width, height, width, height)).astype(int)
+
+    def five_point_landmarks(self, landmarks, frame_shape):
+        """
+        Pixel five-point landmarks [faces, 5, 2] (left eye, right eye, nose,
+        left and right mouth corner, in image space) from FaceMesh landmarks,
+        in the layout FaceAligner expects. The subject's right eye and mouth
+        corner appear on the image's left.
+        """
+        height, width = frame_shape[:2]
+        points = np.stack(
+            [
+                landmarks[:, self.RIGHT_EYE_INDICES].mean(axis=1),
+                landmarks[:, self.LEFT_EYE_INDICES].mean(axis=1),
+                landmarks[:, self.NOSE_TIP_INDEX],
+                landmarks[:, self.MOUTH_CORNER_INDICES[0]],
+                landmarks[:, self.MOUTH_CORNER_INDICES[1]],
+            ],
+            axis=1,
         )
-        right_horizontal = np.linalg.norm(right_eye[0] - right_eye[3])
-        right_ear = right_vertical / (2.0 * right_horizontal)
+        return points * (width, height)
+
+    def detect_eyes(self, frame):
+        """
+        Detect every face in a frame and return (ears [faces], landmarks [faces, 468, 2]).
+        """
+        landmarks = self.get_landmarks(frame)
+        return self.calculate_ears(landmarks), landmarks
 
-        return (left_ear + right_ear) / 2.0
+    def detect_eyes_batch(self, frames):
+        """
+        Detect eyes in a batch of frames, computing EAR for all faces of all
+        frames in one expression. Returns a list of (ears, landmarks) per frame.
+        """
+        per_frame = [self.get_landmarks(frame) for frame in frames]
+        if not per_frame:
+            return []
+        counts = [len(landmarks) for landmarks in per_frame]
+        ears = self.calculate_ears(np.concatenate(per_frame))
+        splits = np.split(ears, np.cumsum(counts)[:-1])
+        return list(zip(splits, per_frame))
 
     def detect_eye_status(self, frame):
-        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(image_rgb)
-        if results.multi_face_landmarks:
-            for face_landmarks in results.multi_face_landmarks:
-                landmarks = np.array([[lm.x, lm.y] for lm in face_landmarks.landmark])
-                ear = self.calculate_ear(
-                    landmarks, self.LEFT_EYE_INDICES, self.RIGHT_EYE_INDICES
-                )
-                return ear, landmarks
+        """
+        EAR and landmarks of the first detected face, or (None, None).
+        """
+        ears, landmarks = self.detect_eyes(frame)
+        if len(ears):
+            return ears[0], landmarks[0]
         return None, None
 
     def draw_eye_landmarks(self, frame, landmarks):
-        for index in self.LEFT_EYE_INDICES + self.RIGHT_EYE_INDICES:
-            x = int(landmarks[index][0] * frame.shape[1])
-            y = int(landmarks[index][1] * frame.shape[0])
+        # Accepts one face [468, 2] or several [faces, 468, 2]
+        points = landmarks[..., self.eye_indices.ravel(), :].reshape(-1, 2)
+        points = (points * (frame.shape[1], frame.shape[0])).astype(int)
+        for x, y in points:
             cv2.circle(frame, (x, y), 3, (0, 0, 255), -1)  # Draw eye landmarks in red
+
+
+class FaceDetector:
+    """
+    Batched face detection with a selectable backend: "mtcnn" (facenet-pytorch),
+    "mediapipe" (MediaPipe face detection) or "retinaface" (the RetinaFace
+    graph via the shared runner).
+
+    Detection runs on a copy downscaled to at most `detection_max_size`
+    pixels on its longer side; boxes and landmarks are mapped back to the
+    original image, which crop_faces then crops from at full resolution.
+
+    Every backend produces, per image, boxes [N, 4] (x1, y1, x2, y2 pixels),
+    scores [N] and five landmarks [N, 5, 2] (left eye, right eye, nose, left
+    and right mouth corner, in image space), sorted by descending score.
+    """
+
+    def __init__(
+        self,
+        backend=FACE_DETECTOR_BACKEND,
+        min_confidence=FACE_DETECTOR_MIN_CONFIDENCE,
+        align=FACE_ALIGNMENT,
+        output_size=160,
+        detection_max_size=DETECTION_MAX_SIZE,
+    ):
+        if backend not in DETECTOR_BACKENDS:
+            raise ValueError(f"Unsupported detector backend: {backend}")
+        self.backend = backend
+        self.min_confidence = min_confidence
+        self.align = align
+        self.output_size = output_size
+        self.detection_max_size = detection_max_size
+        self._mediapipe = None
+        self._mediapipe_lock = threading.Lock()  # MediaPipe graphs are not thread-safe
+        self._local = threading.local()  # One aligner (and its buffers) per thread
+
+    def detect(self, images):
+        """
+        Detect faces in a list of RGB images (arrays, PIL images or Frames).
+        Returns a list of (boxes, scores, landmarks) per image, in the
+        original images' pixel coordinates.
+        """
+        if not images:
+            return []
+        small, scales = zip(*(self._downscale(image) for image in images))
+        detections = getattr(self, f"_detect_{self.backend}")(list(small))
+        return [
+            self._filter(boxes / scale, scores, landmarks / scale)
+            for (boxes, scores, landmarks), scale in zip(detections, scales)
+        ]
+
+    def _downscale(self, image):
+        if isinstance(image, Frame):
+            scale = detection_scale(image.shape, self.detection_max_size)
+            return image.downscaled(scale), scale
+        return downscale(np.asarray(image), self.detection_max_size)
+
+    def detect_faces(self, image):
+        """
+        Faces in one RGB image as a list of (box, score, landmarks) tuples,
+        highest score first; empty when there is no face.
+        """
+        return self.detect_faces_batch([image])[0]
+
+    def detect_faces_batch(self, images):
+        """
+        detect_faces for a list of images, run as one detection batch.
+        """
+        return [list(zip(*detection)) for detection in self.detect(images)]
+
+    def crop_faces(self, image, faces):
+        """
+        Crop faces returned by detect_faces into a [N, 3, size, size] float32
+        batch standardized like MTCNN's output, aligned on their landmarks
+        when alignment is enabled.
+        """
+        image = image.rgb if isinstance(image, Frame) else np.asarray(image)
+        if not faces:
+            return np.empty((0, 3, self.output_size, self.output_size), dtype=np.float32)
+        if self.align:
+            landmarks = np.stack([points for _, _, points in faces])
+            return self._aligner().align(image, landmarks).copy()
+
+        return crop_boxes(image, [box for box, _, _ in faces], self.output_size)
+
+    def warmup(self):
+        """
+        Load only the configured backend's model and run one dummy detection.
+        """
+        if self.backend == "retinaface":
+            registry.get("retinaface_runner").warmup()
+        self.detect([np.zeros((160, 160, 3), dtype=np.uint8)])
+
+    def _aligner(self):
+        aligner = getattr(self._local, "aligner", None)
+        if aligner is None:
+            aligner = self._local.aligner = FaceAligner(self.output_size)
+        return aligner
+
+    def _filter(self, boxes, scores, landmarks):
+        keep = np.flatnonzero(scores >= self.min_confidence)
+        keep = keep[np.argsort(-scores[keep], kind="stable")]
+        return (
+            boxes[keep].astype(np.float32),
+            scores[keep].astype(np.float32),
+            landmarks[keep].astype(np.float32),
+        )
+
+    @staticmethod
+    def _empty():
+        return (
+            np.empty((0, 4), dtype=np.float32),
+            np.empty(0, dtype=np.float32),
+            np.empty((0, 5, 2), dtype=np.float32),
+        )
+
+    def _detect_mtcnn(self, images):
+        # MTCNN batches images of equal size, so group by shape
+        mtcnn = registry.get("mtcnn")
+        detections = [None] * len(images)
+        groups = {}
+        for index, image in enumerate(images):
+            groups.setdefault(image.shape, []).append(index)
+        for indices in groups.values():
+            batch = np.stack([images[index] for index in indices])
+            boxes, probs, points = mtcnn.detect(batch, landmarks=True)
+            for index, b, p, l in zip(indices, boxes, probs, points):
+                detections[index] = self._empty() if b is None else (b, p, l)
+        return detections
+
+    def _detect_mediapipe(self, images):
+        # MediaPipe has no batch API; frames go through one graph in turn
+        with self._mediapipe_lock:
+            if self._mediapipe is None:
+                self._mediapipe = mp.solutions.face_detection.FaceDetection(
+                    model_selection=1, min_detection_confidence=self.min_confidence
+                )
+            return [self._mediapipe_faces(image) for image in images]
+
+    def _mediapipe_faces(self, image):
+        results = self._mediapipe.process(image)
+        if not results.detections:
+            return self._empty()
+        height, width = image.shape[:2]
+        boxes, scores, keypoints = [], [], []
+        for detection in results.detections:
+            box = detection.location_data.relative_bounding_box
+            boxes.append([box.xmin, box.ymin, box.xmin + box.width, box.ymin + box.height])
+            scores.append(detection.score[0])
+            # Keypoints: subject's right eye, left eye, nose tip, mouth center, ears
+            keypoints.append(
+                [(point.x, point.y) for point in detection.location_data.relative_keypoints[:4]]
+            )
+        scale = np.array([width, height], dtype=np.float32)
+        boxes = np.clip(np.array(boxes) * np.tile(scale, 2), 0, np.tile(scale, 2))
+        keypoints = np.array(keypoints, dtype=np.float32) * scale
+        eyes, nose, mouth = keypoints[:, :2], keypoints[:, 2], keypoints[:, 3]
+        half_mouth = 0.5 * MOUTH_TO_EYE_WIDTH * (eyes[:, 1] - eyes[:, 0])
+        landmarks = np.stack(
+            [eyes[:, 0], eyes[:, 1], nose, mouth - half_mouth, mouth + half_mouth], axis=1
+        )
+        return boxes, np.array(scores, dtype=np.float32), landmarks
+
+    def _detect_retinaface(self, images):
+        return registry.get("retinaface_runner").detect(images)
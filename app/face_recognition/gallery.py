@@ -0,0 +1,135 @@
+import numpy as np
+
+
+class FaceGallery:
+    """
+    Known face embeddings kept as one contiguous, L2-normalized float32 matrix.
+
+    Rows are preallocated and grown geometrically on enrollment, so matching a
+    probe (or a batch of probes) is a single matrix multiply over the gallery.
+    """
+
+    def __init__(self, dim=512, capacity=64):
+        self.dim = dim
+        self._embeddings = np.empty((capacity, dim), dtype=np.float32)
+        self._size = 0
+        self.names = []
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def embeddings(self):
+        """
+        View of the enrolled (normalized) embeddings, one row per face.
+        """
+        return self._embeddings[: self._size]
+
+    @staticmethod
+    def normalize(embeddings):
+        """
+        L2-normalize embeddings row-wise into a 2D float32 array.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim == 1:
+            embeddings = embeddings[np.newaxis, :]
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def _reserve(self, count):
+        """
+        Make room for `count` more rows, doubling capacity as needed.
+        """
+        needed = self._size + count
+        capacity = len(self._embeddings)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity = max(2 * capacity, 1)
+        grown = np.empty((capacity, self.dim), dtype=np.float32)
+        grown[: self._size] = self._embeddings[: self._size]
+        self._embeddings = grown
+
+    def add(self, names, embeddings):
+        """
+        Enroll one embedding per name.
+        """
+        if not len(names):
+            return
+        embeddings = self.normalize(embeddings)
+        if len(names) != len(embeddings):
+            raise ValueError("Expected one embedding per name.")
+        self._reserve(len(embeddings))
+        self._embeddings[self._size : self._size + len(embeddings)] = embeddings
+        self._size += len(embeddings)
+        self.names.extend(names)
+
+    def adopt(self, names, embeddings):
+        """
+        Replace the gallery with already-normalized embeddings without copying
+        them, e.g. a memory-mapped snapshot. The array is copied on first growth.
+        """
+        if len(names) != len(embeddings):
+            raise ValueError("Expected one embedding per name.")
+        self._embeddings = embeddings
+        self._size = len(embeddings)
+        self.names = list(names)
+
+    def remove(self, name):
+        """
+        Remove every embedding enrolled under `name`, compacting the matrix.
+        """
+        keep = [i for i, known in enumerate(self.names) if known != name]
+        if len(keep) == self._size:
+            return
+        self._embeddings[: len(keep)] = self._embeddings[keep]
+        self._size = len(keep)
+        self.names = [self.names[i] for i in keep]
+
+    def clear(self):
+        """
+        Remove every enrolled face, keeping the allocated capacity.
+        """
+        self._size = 0
+        self.names = []
+
+    def search(self, probes, k=1):
+        """
+        Find the k most similar gallery entries for each probe.
+
+        Returns (indices, scores), both shaped [num_probes, k] and sorted by
+        descending cosine similarity.
+        """
+        probes = self.normalize(probes)
+        k = min(k, self._size)
+        if k == 0:
+            empty = np.empty((len(probes), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        scores = probes @ self.embeddings.T
+        if k < self._size:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(self._size), (len(probes), self._size))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(
+            top_scores, order, axis=1
+        )
+
+    def match(self, probes, threshold=0.5):
+        """
+        Match each probe to its best gallery entry.
+
+        Returns a list of (name, score) tuples; the name is "Unknown" when the
+        best similarity does not exceed `threshold`.
+        """
+        indices, scores = self.search(probes, k=1)
+        matches = []
+        for row_indices, row_scores in zip(indices, scores):
+            if len(row_indices) and row_scores[0] > threshold:
+                matches.append((self.names[row_indices[0]], float(row_scores[0])))
+            else:
+                score = float(row_scores[0]) if len(row_scores) else None
+                matches.append(("Unknown", score))
+        return matches
@@ -0,0 +1,176 @@
+import argparse
+import os
+
+import cv2
+import numpy as np
+
+from app.config import MATCH_THRESHOLD
+from app.models.artifacts import (
+    FACENET_INT8_ONNX,
+    FACENET_ONNX,
+    cache_path,
+    resolve_artifact,
+    write_checksum,
+)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def load_face_crops(folder, size=160):
+    """
+    Load every face crop in a folder as a [N, 3, size, size] float32 batch,
+    standardized like the recognizer's inputs.
+    """
+    crops = []
+    for filename in sorted(os.listdir(folder)):
+        if not filename.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        img = cv2.imread(os.path.join(folder, filename))
+        if img is None:
+            print(f"Failed to load image: {filename}")
+            continue
+        img = cv2.resize(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), (size, size))
+        crops.append(img.transpose(2, 0, 1))
+    if not crops:
+        return np.empty((0, 3, size, size), dtype=np.float32)
+    return (np.stack(crops).astype(np.float32) - 127.5) / 128.0
+
+
+def load_labelled_crops(folder):
+    """
+    Load a labelled set laid out as folder/<name>/<crop>.jpg.
+    Returns (crops [N, 3, 160, 160], labels [N]).
+    """
+    crops, labels = [], []
+    for name in sorted(os.listdir(folder)):
+        person_dir = os.path.join(folder, name)
+        if not os.path.isdir(person_dir):
+            continue
+        person_crops = load_face_crops(person_dir)
+        crops.append(person_crops)
+        labels.extend([name] * len(person_crops))
+    if not crops:
+        return np.empty((0, 3, 160, 160), dtype=np.float32), np.array(labels)
+    return np.concatenate(crops), np.array(labels)
+
+
+def _calibration_reader(input_name, crops):
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class CropCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            self.rewind()
+
+        def get_next(self):
+            return next(self._batches, None)
+
+        def rewind(self):
+            self._batches = iter({input_name: crop[None]} for crop in crops)
+
+    return CropCalibrationReader()
+
+
+def quantize_embedder(mode="static", calibration_dir=None):
+    """
+    Quantize the exported FP32 facenet ONNX graph to INT8.
+
+    "dynamic" quantizes weights only; "static" also quantizes activations
+    using ranges calibrated on the enrollment crops in `calibration_dir`.
+    Returns the path of the INT8 model.
+    """
+    from onnxruntime import InferenceSession
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+    source = resolve_artifact(FACENET_ONNX)
+    if source is None:
+        raise FileNotFoundError(f"{FACENET_ONNX} not found; export it first.")
+    target = cache_path(FACENET_INT8_ONNX)
+
+    if mode == "dynamic":
+        quantize_dynamic(source, target, weight_type=QuantType.QInt8)
+    elif mode == "static":
+        if calibration_dir is None:
+            raise ValueError("Static quantization needs a calibration_dir of face crops.")
+        crops = load_face_crops(calibration_dir)
+        if not len(crops):
+            raise ValueError(f"No face crops found in {calibration_dir}")
+        input_name = InferenceSession(source, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+        quantize_static(
+            source,
+            target,
+            _calibration_reader(input_name, crops),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+        )
+    else:
+        raise ValueError(f"Unknown quantization mode: {mode}")
+
+    write_checksum(target)
+    return target
+
+
+def _normalize(embeddings):
+    return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+
+def match_rate(embeddings, labels, threshold=MATCH_THRESHOLD):
+    """
+    Leave-one-out identification rate: the share of crops whose most similar
+    other crop has the same label and scores above the match threshold.
+    """
+    similarities = embeddings @ embeddings.T
+    np.fill_diagonal(similarities, -np.inf)
+    best = similarities.argmax(axis=1)
+    correct = (labels[best] == labels) & (similarities[np.arange(len(labels)), best] > threshold)
+    return float(correct.mean()) if len(labels) else 0.0
+
+
+def evaluate_quantization(reference, quantized, labelled_dir, batch_size=32):
+    """
+    Compare an INT8 embedder against the FP32 reference on a labelled set.
+
+    Reports the cosine drift between each crop's FP32 and INT8 embeddings
+    and the leave-one-out match rate of both models.
+    """
+    crops, labels = load_labelled_crops(labelled_dir)
+
+    def embed(embedder):
+        return _normalize(
+            np.concatenate(
+                [embedder(crops[i : i + batch_size]) for i in range(0, len(crops), batch_size)]
+            )
+        )
+
+    fp32, int8 = embed(reference), embed(quantized)
+    drift = 1.0 - (fp32 * int8).sum(axis=1)
+    fp32_rate, int8_rate = match_rate(fp32, labels), match_rate(int8, labels)
+    return {
+        "samples": int(len(labels)),
+        "mean_cosine_drift": float(drift.mean()),
+        "max_cosine_drift": float(drift.max()),
+        "fp32_match_rate": fp32_rate,
+        "int8_match_rate": int8_rate,
+        "match_rate_change": int8_rate - fp32_rate,
+    }
+
+
+if __name__ == "__main__":
+    # python -m app.face_recognition.quantization --mode static --calibration-dir crops/ --eval-dir labelled/
+    from app.face_recognition.backends import OnnxEmbedder
+
+    parser = argparse.ArgumentParser(description="Quantize the face embedder to INT8.")
+    parser.add_argument("--mode", choices=["dynamic", "static"], default="static")
+    parser.add_argument("--calibration-dir", help="Folder of enrollment face crops")
+    parser.add_argument("--eval-dir", help="Labelled set laid out as <name>/<crop>.jpg")
+    args = parser.parse_args()
+
+    path = quantize_embedder(args.mode, args.calibration_dir)
+    print(f"Saved {path}")
+    if args.eval_dir:
+        report = evaluate_quantization(
+            OnnxEmbedder(resolve_artifact(FACENET_ONNX)), OnnxEmbedder(path), args.eval_dir
+        )
+        for key, value in report.items():
+            print(f"{key}: {value}")
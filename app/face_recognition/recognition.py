@@ -1,24 +1,64 @@
 import cv2
 import numpy as np
-from facenet_pytorch import InceptionResnetV1, MTCNN
-from sklearn.metrics.pairwise import cosine_similarity
+
+from app.config import DETECTION_MAX_SIZE, FACE_ALIGNMENT, MATCH_THRESHOLD
+from app.face_recognition.alignment import FaceAligner, crop_boxes, downscale
+from app.face_recognition.backends import TorchEmbedder
+from app.face_recognition.gallery import FaceGallery
+from app.face_recognition.snapshot import GallerySnapshot
+from app.factory import registry
+from app.utils.frame_utils import as_frame
 
 
 class FaceRecognizer:
-    def __init__(self):
-        # Initialize the face recognition model (InceptionResnetV1 from facenet-pytorch)
-        self.mtcnn = MTCNN(keep_all=True)  # Used for face detection
-        self.model = InceptionResnetV1(
-            pretrained="vggface2"
-        ).eval()  # Used for face recognition
-        self.known_embeddings = []
-        self.known_names = []
+    def __init__(
+        self,
+        batch_size=32,
+        threshold=MATCH_THRESHOLD,
+        mtcnn=None,
+        model=None,
+        align=FACE_ALIGNMENT,
+        detection_max_size=DETECTION_MAX_SIZE,
+    ):
+        # Models default to the shared, lazily-loaded instances in the registry
+        self._mtcnn = mtcnn  # Used for face detection
+        # Embedding backend (PyTorch or ONNX Runtime), used for face recognition
+        self._embedder = TorchEmbedder(model) if model is not None else None
+        self.batch_size = batch_size  # Max faces per forward pass
+        self.threshold = threshold  # Min cosine similarity for a match
+        self.aligner = FaceAligner() if align else None
+        self.detection_max_size = detection_max_size  # Longer side MTCNN sees
+        self.gallery = FaceGallery()
+
+    @property
+    def mtcnn(self):
+        if self._mtcnn is None:
+            self._mtcnn = registry.get("mtcnn")
+        return self._mtcnn
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = registry.get("embedder")
+        return self._embedder
+
+    def warmup(self, detector=False):
+        """
+        Load the embedder and run one dummy batch so later calls start warm.
+        MTCNN (and with it PyTorch) is only loaded when `detector` is set, as
+        the API detects faces with FaceDetector instead.
+        """
+        if detector:
+            self.mtcnn  # Resolving the property loads the detector
+        self.get_embeddings(np.zeros((1, 3, 160, 160), dtype=np.float32))
 
     def load_known_faces(self, known_faces, known_names):
         """
         Loads known faces and their names into the recognizer.
         """
-        for img_path in known_faces:
+        crops = []
+        names = []
+        for img_path, name in zip(known_faces, known_names):
             img = cv2.imread(img_path)
             if img is None:
                 print(f"Failed to load image: {img_path}")
@@ -26,49 +66,145 @@ class FaceRecognizer:
             img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)  # Convert to RGB
 
             # Detect faces using MTCNN
-            faces = self.mtcnn(img_rgb)  # Only one value returned
+            faces = self.detect_faces(img_rgb)
 
             if faces is not None:
-                for face in faces:
-                    embedding = self.get_embedding(face)  # Get the face embedding
-                    self.known_embeddings.append(embedding)
-        self.known_names = known_names
+                # One face per enrollment photo; copy out of the aligner's buffer
+                crops.append(np.array(faces[:1], dtype=np.float32))
+                names.append(name)
+
+        # Embed the faces of every image in one batched pass
+        if crops:
+            self.gallery.add(names, self.get_embeddings(np.concatenate(crops)))
+
+    def load_snapshot(self, path, sources=None):
+        """
+        Load the known faces from a gallery snapshot, memory-mapped rather
+        than recomputed. Returns False if there is no snapshot at `path`, or
+        if `sources` is given and the snapshot was built from other photos.
+        """
+        snapshot = GallerySnapshot(path)
+        if not snapshot.exists():
+            return False
+        if sources is not None and snapshot.read_meta().get("sources") != sources:
+            return False
+        self.gallery.adopt(*snapshot.load())
+        return True
+
+    def save_snapshot(self, path, sources=None):
+        """
+        Write the known faces to a gallery snapshot, recording the `sources`
+        they were built from.
+        """
+        GallerySnapshot(path).save(self.gallery.names, self.gallery.embeddings, sources)
+
+    def detect_faces(self, img_rgb):
+        """
+        Detect the faces in an RGB image, largest first, as a [N, 3, 160, 160]
+        batch ready for embedding (aligned when alignment is enabled), or None.
+        """
+        # MTCNN's pyramid cost grows with image area, so detect on a
+        # downscaled copy and crop the faces from the full-resolution image
+        small, scale = downscale(img_rgb, self.detection_max_size)
+        boxes, _, points = self.mtcnn.detect(small, landmarks=True)
+        if boxes is None or len(boxes) == 0:
+            return None
+        boxes, points = boxes / scale, points / scale
+        order = np.argsort(-(boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]))
+        if self.aligner is None:
+            return crop_boxes(img_rgb, boxes[order])
+        return self.aligner.align(img_rgb, points[order])
+
+    @property
+    def known_names(self):
+        return self.gallery.names
+
+    def get_embeddings(self, faces):
+        """
+        Given a stack of face crops, get all embeddings from the embedding backend.
+
+        `faces` is a [N, 3, 160, 160] tensor or array (as returned by MTCNN or
+        FaceAligner) or a list of [3, 160, 160] tensors. Faces are run through
+        the model in chunks of at most `batch_size`, without gradient tracking,
+        and returned as a [N, 512] float32 array of L2-normalized embeddings.
+        """
+        if isinstance(faces, (list, tuple)):
+            if not faces:
+                return np.empty((0, 512), dtype=np.float32)
+            faces = np.stack([np.asarray(face, dtype=np.float32) for face in faces])
+
+        embeddings = np.empty((len(faces), 512), dtype=np.float32)
+        for start in range(0, len(faces), self.batch_size):
+            batch = faces[start : start + self.batch_size]
+            embeddings[start : start + len(batch)] = self.embedder(batch)
+
+        # Normalize once here so every consumer can match by inner product
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings
 
     def get_embedding(self, face_img):
         """
         Given a face image, get the embedding using InceptionResnetV1.
         """
-        # Ensure face_img is a 4D tensor: [batch_size, channels, height, width]
-        face_img = face_img.unsqueeze(0)  # Add batch dimension
-        face_embedding = self.model(face_img)
-        return face_embedding.detach().cpu().numpy()
+        # Keep the [1, 512] shape callers of the single-face API expect
+        return self.get_embeddings(face_img[None])
+
+    def generate_embedding(self, face_img):
+        """
+        Given a face image, get its embedding as a flat 512-d vector.
+        """
+        return self.get_embedding(face_img)[0]
+
+    def generate_embeddings(self, faces):
+        """
+        Given a batch of face images, get one 512-d embedding per face.
+        """
+        return self.get_embeddings(faces)
 
     def recognize_face(self, face_img):
         """
         Recognizes a face and returns the name of the person.
         """
-        face_rgb = cv2.cvtColor(face_img, cv2.COLOR_BGR2RGB)  # Convert to RGB
-        faces = self.mtcnn(face_rgb)  # Detect faces using MTCNN
+        name, _ = self.identify(face_img)
+        return name
+
+    def identify(self, face_img):
+        """
+        Recognizes the first face in a BGR image (array or Frame) and returns
+        (name, similarity).
+        """
+        face_rgb = as_frame(face_img).rgb
+        faces = self.detect_faces(face_rgb)  # Detect faces using MTCNN
 
         if faces is None or len(faces) == 0:  # Check if faces is None or empty
-            return "No face detected"
+            return "No face detected", None
 
         # Process the first detected face
         face_embedding = self.get_embedding(faces[0])
+        return self.match_embeddings(face_embedding)[0]
 
-        # Flatten the face_embedding to a 1D array
-        face_embedding = face_embedding.flatten()
-
-        # Compare the detected face embedding with known face embeddings
-        similarities = [
-            cosine_similarity([face_embedding], [embed.flatten()])[0][
-                0
-            ]  # Flatten the known embeddings as well
-            for embed in self.known_embeddings
-        ]
-
-        best_match_index = np.argmax(similarities)
-        name = "Unknown"
-        if similarities[best_match_index] > 0.5:  # Threshold for recognizing
-            name = self.known_names[best_match_index]
-        return name
+    def identify_faces(self, frame, boxes, landmarks=None):
+        """
+        Recognize faces already located by another detector (e.g. FaceMesh)
+        in a BGR frame (array or Frame), skipping MTCNN. With alignment enabled and five-point
+        `landmarks` [N, 5, 2] given, faces are aligned on them; otherwise the
+        pixel `boxes` [N, 4] are cropped and resized.
+
+        Returns one (name, similarity) tuple per face.
+        """
+        if len(boxes) == 0:
+            return []
+        frame_rgb = as_frame(frame).rgb
+        if self.aligner is not None and landmarks is not None:
+            faces = self.aligner.align(frame_rgb, np.asarray(landmarks, dtype=np.float32))
+        else:
+            faces = crop_boxes(frame_rgb, boxes)
+        return self.match_embeddings(self.get_embeddings(faces))
+
+    def match_embeddings(self, embeddings):
+        """
+        Matches a batch of embeddings against the known faces.
+
+        Returns one (name, similarity) tuple per embedding.
+        """
+        return self.gallery.match(embeddings, threshold=self.threshold)
@@ -0,0 +1,159 @@
+import json
+import os
+
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+
+META_FILE = "meta.json"
+EMBEDDINGS_FILE = "embeddings.f32"
+NAMES_FILE = "names.txt"
+
+
+class GallerySnapshot:
+    """
+    On-disk face gallery: a directory holding
+
+      meta.json       {"version", "dim", "count", "sources"}
+      embeddings.f32  raw little-endian float32 rows, L2-normalized
+      names.txt       one UTF-8 name per line, row-aligned with the embeddings
+
+    Embeddings are memory-mapped on load, so opening a gallery costs a few
+    page faults instead of a model pass over every photo. Appends write rows
+    and names first and rewrite meta.json last, so a crash mid-append leaves
+    the previous `count` valid and the partial tail is ignored. `save` writes
+    new files and renames them into place, so galleries still mapping the old
+    snapshot keep reading it instead of faulting on a truncated file.
+
+    `sources` optionally records what the gallery was built from (see
+    photo_sources) so callers can tell when it is stale.
+    """
+
+    def __init__(self, path, dim=512):
+        self.path = path
+        self.dim = dim
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def exists(self):
+        return os.path.exists(self._file(META_FILE))
+
+    def read_meta(self):
+        with open(self._file(META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported gallery snapshot version: {meta.get('version')}")
+        if meta["dim"] != self.dim:
+            raise ValueError(f"Gallery snapshot has dim {meta['dim']}, expected {self.dim}")
+        return meta
+
+    def _write_meta(self, count, sources=None):
+        meta = {"version": SNAPSHOT_VERSION, "dim": self.dim, "count": count}
+        if sources is not None:
+            meta["sources"] = sources
+        self._replace(META_FILE, json.dumps(meta).encode("utf-8"))
+
+    def _replace(self, name, data):
+        # Write a new file and rename it over the old one: readers that have
+        # the old file open or mapped keep its contents
+        tmp_path = self._file(name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._file(name))
+
+    def load(self):
+        """
+        Returns (names, embeddings), where embeddings is a [count, dim]
+        copy-on-write memory map: it can be modified in memory without
+        touching the file.
+        """
+        count = self.read_meta()["count"]
+        with open(self._file(NAMES_FILE), encoding="utf-8") as f:
+            names = f.read().split("\n")[:count]
+        if count == 0:
+            return names, np.empty((0, self.dim), dtype=np.float32)
+        embeddings = np.memmap(
+            self._file(EMBEDDINGS_FILE), dtype="<f4", mode="c", shape=(count, self.dim)
+        )
+        return names, embeddings
+
+    def save(self, names, embeddings, sources=None):
+        """
+        Write a complete gallery, replacing any existing snapshot. `embeddings`
+        may be a memory map of the snapshot being replaced.
+        """
+        rows = self._rows(names, embeddings).tobytes()
+        os.makedirs(self.path, exist_ok=True)
+        self._write_meta(0)  # A crash before the final meta.json leaves an empty gallery
+        self._replace(EMBEDDINGS_FILE, rows)
+        self._replace(NAMES_FILE, "".join(f"{name}\n" for name in names).encode("utf-8"))
+        self._write_meta(len(names), sources)
+
+    def append(self, names, embeddings):
+        """
+        Add rows to the end of the snapshot, creating it if needed.
+        """
+        if not self.exists():
+            self.save(names, embeddings)
+            return
+        meta = self.read_meta()
+        count = meta["count"]
+        rows = self._rows(names, embeddings)
+        with open(self._file(EMBEDDINGS_FILE), "r+b") as f:
+            f.truncate(count * self.dim * 4)  # Drop any tail from an interrupted append
+            f.seek(0, os.SEEK_END)
+            f.write(rows.tobytes())
+        with open(self._file(NAMES_FILE), "r+b") as f:
+            data = f.read()
+            end = 0
+            for _ in range(count):
+                end = data.index(b"\n", end) + 1
+            f.truncate(end)
+            f.seek(end)
+            f.write("".join(f"{name}\n" for name in names).encode("utf-8"))
+        self._write_meta(count + len(names), meta.get("sources"))
+
+    def _rows(self, names, embeddings):
+        rows = np.asarray(embeddings, dtype="<f4").reshape(-1, self.dim)
+        if len(rows) != len(names):
+            raise ValueError("Expected one embedding per name.")
+        if any("\n" in name for name in names):
+            raise ValueError("Names cannot contain newlines.")
+        norms = np.linalg.norm(rows, axis=1, keepdims=True)
+        return rows / np.maximum(norms, 1e-12)
+
+
+def photo_sources(paths, names):
+    """
+    [path, name, mtime_ns] for each enrollment photo (mtime None if missing),
+    stored as a snapshot's `sources` to detect when the photos have changed.
+    """
+    sources = []
+    for path, name in zip(paths, names):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        sources.append([path, name, mtime])
+    return sources
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.client.user_client import UserClient
+    from app.config import MILVUS_EXPORT_DIR
+
+    parser = argparse.ArgumentParser(description="Copy the face gallery between Milvus and disk.")
+    parser.add_argument("direction", choices=["export", "import"])
+    parser.add_argument("--path", default=MILVUS_EXPORT_DIR)
+    args = parser.parse_args()
+
+    client = UserClient()
+    if args.direction == "export":
+        print(f"Exported {client.export_snapshot(args.path)} faces to {args.path}")
+    else:
+        print(f"Imported {client.import_snapshot(args.path)} faces from {args.path}")
@@ -0,0 +1,118 @@
+import numpy as np
+
+from app.config import (
+    TRACK_IOU_THRESHOLD,
+    TRACK_LOW_CONFIDENCE_INTERVAL,
+    TRACK_MAX_MISSED,
+    TRACK_MIN_CONFIDENCE,
+    TRACK_REVERIFY_INTERVAL,
+)
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    Pairwise IoU between [A, 4] and [B, 4] boxes in (x1, y1, x2, y2) form.
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.clip(bottom_right - top_left, 0, None).prod(axis=-1)
+    area_a = (boxes_a[:, 2:] - boxes_a[:, :2]).prod(axis=-1)
+    area_b = (boxes_b[:, 2:] - boxes_b[:, :2]).prod(axis=-1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-6)
+
+
+class Track:
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.box = box
+        self.name = None  # Identity, None until first recognized
+        self.score = None  # Similarity of the last recognition
+        self.last_recognized = None  # Frame index of the last recognition
+        self.missed = 0  # Consecutive frames without a matching detection
+
+
+class FaceTracker:
+    """
+    Multi-face IoU tracker deciding when a face actually needs recognition.
+
+    Detections are greedily associated with existing tracks by IoU; new
+    faces start new tracks and tracks unseen for `max_missed` frames are
+    dropped. `needs_recognition` is True for a new track, after
+    `reverify_interval` frames, or after `low_confidence_interval` frames
+    when the last match scored below `min_confidence`.
+    """
+
+    def __init__(
+        self,
+        iou_threshold=TRACK_IOU_THRESHOLD,
+        max_missed=TRACK_MAX_MISSED,
+        reverify_interval=TRACK_REVERIFY_INTERVAL,
+        min_confidence=TRACK_MIN_CONFIDENCE,
+        low_confidence_interval=TRACK_LOW_CONFIDENCE_INTERVAL,
+    ):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.reverify_interval = reverify_interval
+        self.min_confidence = min_confidence
+        self.low_confidence_interval = low_confidence_interval
+        self.tracks = []
+        self.frame_index = 0
+        self._next_id = 0
+
+    def update(self, boxes):
+        """
+        Associate this frame's boxes with tracks.
+
+        Returns the track for each box, in the same order as `boxes`.
+        """
+        self.frame_index += 1
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        assigned = [None] * len(boxes)
+
+        if self.tracks and len(boxes):
+            ious = iou_matrix([track.box for track in self.tracks], boxes)
+            # Greedy association, best overlaps first; each track and each box
+            # is matched at most once
+            used = set()
+            for flat in np.argsort(-ious, axis=None):
+                t, b = np.unravel_index(flat, ious.shape)
+                if ious[t, b] < self.iou_threshold:
+                    break
+                if t in used or assigned[b] is not None:
+                    continue
+                assigned[b] = self.tracks[t]
+                used.add(t)
+
+        for track in self.tracks:
+            if track not in assigned:
+                track.missed += 1
+        for b, track in enumerate(assigned):
+            if track is None:
+                track = Track(self._next_id, boxes[b])
+                self._next_id += 1
+                self.tracks.append(track)
+                assigned[b] = track
+            track.box = boxes[b]
+            track.missed = 0
+
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+        return assigned
+
+    def needs_recognition(self, track):
+        if track.last_recognized is None:
+            return True
+        elapsed = self.frame_index - track.last_recognized
+        if elapsed >= self.reverify_interval:
+            return True
+        low_confidence = track.name != "Unknown" and (
+            track.score is None or track.score < self.min_confidence
+        )
+        return low_confidence and elapsed >= self.low_confidence_interval
+
+    def set_identity(self, track, name, score):
+        track.name = name
+        track.score = score
+        track.last_recognized = self.frame_index
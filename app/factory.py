@@ -0,0 +1,190 @@
+import logging
+import threading
+
+from app.config import (
+    EMBEDDING_BACKEND,
+    MODEL_ALLOW_DOWNLOAD,
+    MODEL_CACHE_DIR,
+    MODEL_USE_SERIALIZED,
+    ONNX_INTER_OP_THREADS,
+    ONNX_INTRA_OP_THREADS,
+    RETINAFACE_BACKEND,
+    RETINAFACE_BATCH_SIZE,
+    RETINAFACE_BUCKETS,
+    RETINAFACE_THRESHOLD,
+    RETINAFACE_XLA,
+)
+from app.models.artifacts import (
+    FACENET_INT8_ONNX,
+    FACENET_ONNX,
+    FACENET_TORCHSCRIPT,
+    FACENET_WEIGHTS,
+    RETINAFACE_ONNX,
+    RETINAFACE_SAVED_MODEL,
+    RETINAFACE_WEIGHTS,
+    artifact_dirs,
+    download_retinaface_weights,
+    resolve_artifact,
+    save_facenet,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Process-wide registry that builds each model lazily, exactly once.
+
+    Models are registered by name with a zero-argument loader and built on
+    first `get`; every later caller (in any thread) shares the same instance.
+    `ready` flips to True once `warmup` has loaded everything; `error` holds
+    the exception if the background warmup failed.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._lock = threading.RLock()  # Re-entrant: loaders may get() others
+        self.ready = False
+        self.error = None
+
+    def register(self, name, loader):
+        """
+        Register a loader for a model name, dropping any already-built instance.
+        """
+        with self._lock:
+            self._loaders[name] = loader
+            self._models.pop(name, None)
+
+    def get(self, name):
+        """
+        Return the shared instance of a model, building it on first use.
+        """
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                if name not in self._models:
+                    if name not in self._loaders:
+                        raise KeyError(f"No model registered under '{name}'")
+                    self._models[name] = self._loaders[name]()
+                model = self._models[name]
+        return model
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def warmup(self, names=None):
+        """
+        Load the given (default: all registered) models and mark the registry ready.
+        """
+        for name in names or list(self._loaders):
+            self.get(name)
+        self.ready = True
+
+
+def _load_mtcnn():
+    # MTCNN's weights ship inside the facenet-pytorch package; no download
+    from facenet_pytorch import MTCNN
+
+    return MTCNN(keep_all=True)
+
+
+def _load_facenet():
+    import torch
+    from facenet_pytorch import InceptionResnetV1
+
+    if MODEL_USE_SERIALIZED:
+        scripted = resolve_artifact(FACENET_TORCHSCRIPT)
+        if scripted is not None:
+            return torch.jit.load(scripted, map_location="cpu").eval()
+
+    weights = resolve_artifact(FACENET_WEIGHTS)
+    if weights is not None:
+        model = InceptionResnetV1(pretrained=None)
+        state = torch.load(weights, map_location="cpu")
+        model.load_state_dict(
+            {k: v for k, v in state.items() if not k.startswith("logits.")}
+        )
+        return model.eval()
+
+    if not MODEL_ALLOW_DOWNLOAD:
+        raise FileNotFoundError(
+            f"{FACENET_WEIGHTS} not found in {artifact_dirs()} and downloads are disabled."
+        )
+    model = InceptionResnetV1(pretrained="vggface2").eval()
+    try:
+        save_facenet(model)  # Next start loads from the local cache
+    except OSError as e:
+        # The downloaded model still works; only the cache write failed
+        logger.warning("Could not cache FaceNet weights in %s: %s", MODEL_CACHE_DIR, e)
+    return model
+
+
+def _load_retinaface():
+    if MODEL_USE_SERIALIZED:
+        saved = resolve_artifact(RETINAFACE_SAVED_MODEL)
+        if saved is not None:
+            import tensorflow as tf
+
+            return tf.keras.models.load_model(saved, compile=False)
+
+    from model.retinaface_model import build_model
+
+    weights = resolve_artifact(RETINAFACE_WEIGHTS)
+    if weights is None:
+        if not MODEL_ALLOW_DOWNLOAD:
+            raise FileNotFoundError(
+                f"{RETINAFACE_WEIGHTS} not found in {artifact_dirs()} and downloads are disabled."
+            )
+        # Downloaded into the artifact cache with a checksum sidecar, so the
+        # next start loads (and verifies) the local copy
+        weights = download_retinaface_weights()
+    return build_model(weights_path=weights, allow_download=False)
+
+
+def _require_artifact(name):
+    path = resolve_artifact(name)
+    if path is None:
+        raise FileNotFoundError(
+            f"{name} not found in {artifact_dirs()}; export it with 'python -m app.models.artifacts'."
+        )
+    return path
+
+
+def _load_embedder():
+    from app.face_recognition.backends import OnnxEmbedder, TorchEmbedder
+
+    if EMBEDDING_BACKEND in ("onnx", "onnx_int8"):
+        onnx_model = FACENET_INT8_ONNX if EMBEDDING_BACKEND == "onnx_int8" else FACENET_ONNX
+        return OnnxEmbedder(
+            _require_artifact(onnx_model),
+            intra_op_threads=ONNX_INTRA_OP_THREADS,
+            inter_op_threads=ONNX_INTER_OP_THREADS,
+        )
+    return TorchEmbedder(registry.get("facenet"))
+
+
+def _load_retinaface_runner():
+    from model.retinaface_inference import OnnxRetinaFaceRunner, RetinaFaceRunner
+
+    options = dict(
+        buckets=RETINAFACE_BUCKETS,
+        max_batch_size=RETINAFACE_BATCH_SIZE,
+        threshold=RETINAFACE_THRESHOLD,
+    )
+    if RETINAFACE_BACKEND == "onnx":
+        return OnnxRetinaFaceRunner(
+            _require_artifact(RETINAFACE_ONNX),
+            intra_op_threads=ONNX_INTRA_OP_THREADS,
+            inter_op_threads=ONNX_INTER_OP_THREADS,
+            **options,
+        )
+    return RetinaFaceRunner(registry.get("retinaface"), jit_compile=RETINAFACE_XLA, **options)
+
+
+registry = ModelRegistry()
+registry.register("mtcnn", _load_mtcnn)
+registry.register("facenet", _load_facenet)
+registry.register("retinaface", _load_retinaface)
+registry.register("embedder", _load_embedder)
+registry.register("retinaface_runner", _load_retinaface_runner)
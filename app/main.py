@@ -1,20 +1,37 @@
-import cv2
-from face_recognition.detection import FaceMeshDetector
-from face_recognition.recognition import FaceRecognizer
-
+import threading
 
+import cv2
+import numpy as np
+from app.config import GALLERY_SNAPSHOT_DIR, SCHEDULER_ENABLED
+from app.face_recognition.detection import FaceMeshDetector
+from app.face_recognition.recognition import FaceRecognizer
+from app.face_recognition.snapshot import photo_sources
+from app.face_recognition.tracking import FaceTracker
+from app.pipeline import CaptureStage, DropQueue, Stage, StageStats, format_stats
+from app.scheduler import RECOGNIZE, SKIP, MotionScheduler
+from app.utils.frame_utils import FramePool
+
+
+# Run from the repository root with: python -m app.main
 def main():
     # Initialize the face mesh detector and face recognizer
     face_mesh_detector = FaceMeshDetector(min_detection_confidence=0.5)
     face_recognizer = FaceRecognizer()
+    face_tracker = FaceTracker()
 
-    # Load known faces and names
     known_faces = [
         "/home/bhupen/Downloads/bhupendra.jpeg",  # Replace with the correct paths
         "/home/bhupen/Downloads/shubham.jpeg",
     ]
     known_names = ["bhupen", "Shubham"]  # Replace with the correct names
-    face_recognizer.load_known_faces(known_faces, known_names)
+
+    # Load known faces from the gallery snapshot, rebuilding it when the
+    # photos or names above have changed since it was written
+    sources = photo_sources(known_faces, known_names)
+    if not face_recognizer.load_snapshot(GALLERY_SNAPSHOT_DIR, sources):
+        face_recognizer.load_known_faces(known_faces, known_names)
+        if face_recognizer.gallery.names:  # Never persist a gallery with no faces
+            face_recognizer.save_snapshot(GALLERY_SNAPSHOT_DIR, sources)
 
     # EAR threshold for eye status
     EAR_THRESHOLD = 0.3
@@ -26,29 +43,105 @@ def main():
         print("Error: Unable to access the camera.")
         return
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Error: Unable to read from the camera.")
-            break
-
-        # Detect eye status and landmarks
-        ear, landmarks = face_mesh_detector.detect_eye_status(frame)
-        eye_status = "Open" if ear is not None and ear > EAR_THRESHOLD else "Closed"
-
-        # Perform face recognition
-        name = "No face detected"
-        if ear is not None:
-            name = face_recognizer.recognize_face(frame)
+    # Decides per frame between skipping, FaceMesh only and full recognition
+    scheduler = MotionScheduler() if SCHEDULER_ENABLED else None
+    last_detection = {"ears": [], "landmarks": np.empty((0, 468, 2)), "boxes": np.empty((0, 4))}
+    last_recognition = {"names": []}
+
+    def detect(item):
+        frame = item["frame"]
+        item["action"] = scheduler.decide(frame) if scheduler else RECOGNIZE
+        if item["action"] == SKIP:
+            item.update(last_detection)  # Still scene: reuse the last results
+            return item
+
+        # Detect eye status and landmarks for every face
+        item["ears"], item["landmarks"] = face_mesh_detector.detect_eyes(frame)
+        item["boxes"] = face_mesh_detector.landmarks_to_boxes(
+            item["landmarks"], frame.shape, margin=0.25
+        )
+        last_detection.update(ears=item["ears"], landmarks=item["landmarks"], boxes=item["boxes"])
+        return item
+
+    def recognize(item):
+        if item["action"] == SKIP:
+            item["names"] = last_recognition["names"]
+            return item
+
+        # Track faces and only run recognition for new tracks or when an
+        # identity is due for re-verification; on FaceMesh-only frames, only
+        # faces that were never recognized are
+        frame = item["frame"]
+        tracks = face_tracker.update(item["boxes"])
+        due = [
+            i
+            for i, (track, (x1, y1, x2, y2)) in enumerate(zip(tracks, item["boxes"]))
+            if x2 > x1
+            and y2 > y1
+            and (
+                face_tracker.needs_recognition(track)
+                if item["action"] == RECOGNIZE
+                else track.last_recognized is None
+            )
+        ]
+        if due:
+            # Embed the FaceMesh regions directly instead of re-detecting
+            # them with MTCNN, aligned on FaceMesh's eye/nose/mouth points
+            points = face_mesh_detector.five_point_landmarks(item["landmarks"][due], frame.shape)
+            matches = face_recognizer.identify_faces(frame, item["boxes"][due], points)
+            for i, (name, score) in zip(due, matches):
+                face_tracker.set_identity(tracks[i], name, score)
+        item["names"] = [track.name or "Recognizing" for track in tracks]
+        last_recognition["names"] = item["names"]
+        return item
+
+    # capture -> detect -> recognize -> display, with latest-frame-wins queues
+    # between stages so the display never falls behind the camera
+    stop_event = threading.Event()
+
+    def release_frame(item):
+        # Frames go back to the pool once displayed or dropped
+        item["frame"].release()
+
+    queues = {
+        "frames": DropQueue(maxsize=1, on_drop=release_frame),
+        "detected": DropQueue(maxsize=1, on_drop=release_frame),
+        "results": DropQueue(maxsize=1, on_drop=release_frame),
+    }
+    stages = [
+        # Usually no more than 7 frames are alive at once (one per stage,
+        # queue and the display); capture allocates if all 8 are in use
+        CaptureStage(cap, queues["frames"], stop_event, pool=FramePool(depth=8)),
+        Stage("detect", detect, queues["frames"], queues["detected"], stop_event, release_frame),
+        Stage(
+            "recognize", recognize, queues["detected"], queues["results"], stop_event, release_frame
+        ),
+    ]
+    for stage in stages:
+        stage.start()
+    display_stats = StageStats("display")
+
+    while not stop_event.is_set():
+        item = queues["results"].get(timeout=0.1)
+        if item is None:
+            # Keep the window responsive (and 'q' working) while waiting
+            if cv2.waitKey(1) & 0xFF == ord("q"):
+                break
+            continue
+        frame = item["frame"].bgr  # Last owner of the frame; draw on it in place
+        eye_status = ", ".join(
+            "Open" if ear > EAR_THRESHOLD else "Closed" for ear in item["ears"]
+        )
 
         # Draw landmarks and bounding boxes
-        if landmarks is not None:
-            face_mesh_detector.draw_eye_landmarks(frame, landmarks)
+        if len(item["landmarks"]):
+            face_mesh_detector.draw_eye_landmarks(frame, item["landmarks"])
 
-        # Display the recognized name and eye status
+        # Display the recognized names and eye status
+        names = ", ".join(item["names"]) or "No face detected"
         cv2.putText(
             frame,
-            f"{name} | Eye: {eye_status}",
+            f"{names} | Eye: {eye_status or 'Closed'}",
             (10, 30),
             cv2.FONT_HERSHEY_SIMPLEX,
             0.7,
@@ -56,14 +149,34 @@ def main():
             2,
         )
 
+        # Display per-stage throughput and queue depth to spot the bottleneck
+        display_stats.tick()
+        cv2.putText(
+            frame,
+            f"{format_stats(stages, queues)} | display {display_stats.fps:.1f}fps"
+            + (f" | {scheduler.summary()}" if scheduler else ""),
+            (10, frame.shape[0] - 10),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.4,
+            (255, 255, 0),
+            1,
+        )
+
         # Show the frame
         cv2.imshow("Face Recognition and Eye Status", frame)
+        release_frame(item)  # imshow copies the image
 
         # Break the loop on 'q' key press
         if cv2.waitKey(1) & 0xFF == ord("q"):
             break
 
     # Release resources
+    stop_event.set()
+    for stage in stages:
+        stage.join()
+    print(format_stats(stages, queues))
+    if scheduler:
+        print(f"Scheduled frames: {scheduler.summary()}")
     cap.release()
     cv2.destroyAllWindows()
 
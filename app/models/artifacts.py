@@ -0,0 +1,204 @@
+import hashlib
+import os
+
+from app.config import MODEL_CACHE_DIR, MODEL_CHECKSUMS
+
+BUNDLED_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FACENET_WEIGHTS = "facenet_model.pth"
+FACENET_TORCHSCRIPT = "facenet_model.ts"
+FACENET_ONNX = "facenet_model.onnx"
+FACENET_INT8_ONNX = "facenet_model.int8.onnx"
+RETINAFACE_WEIGHTS = "retinaface.h5"
+RETINAFACE_SAVED_MODEL = "retinaface_savedmodel"
+RETINAFACE_ONNX = "retinaface.onnx"
+
+RETINAFACE_WEIGHTS_URL = (
+    "https://github.com/serengil/deepface_models/releases/download/v1.0/retinaface.h5"
+)
+
+
+def artifact_dirs():
+    """
+    Directories searched for model artifacts, in priority order.
+    """
+    return [MODEL_CACHE_DIR, BUNDLED_DIR]
+
+
+def sha256sum(path, chunk_size=1 << 20):
+    """
+    sha256 of a file, or of a directory's relative file paths and contents
+    (e.g. a SavedModel), walked in sorted order.
+    """
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.relpath(os.path.join(root, filename), path)
+            for root, _, filenames in os.walk(path)
+            for filename in filenames
+        )
+    else:
+        files = [None]
+    for relative in files:
+        if relative is not None:
+            digest.update(relative.replace(os.sep, "/").encode("utf-8") + b"\0")
+        with open(path if relative is None else os.path.join(path, relative), "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def expected_checksum(path):
+    """
+    Expected sha256 of an artifact from config or its ".sha256" sidecar, if any.
+    """
+    expected = MODEL_CHECKSUMS.get(os.path.basename(path))
+    sidecar = path + ".sha256"
+    if expected is None and os.path.isfile(sidecar):
+        with open(sidecar) as f:
+            expected = f.read().split()[0]
+    return expected.lower() if expected else None
+
+
+def write_checksum(path):
+    """
+    Record the sha256 of an artifact in its ".sha256" sidecar.
+    """
+    with open(path + ".sha256", "w") as f:
+        f.write(f"{sha256sum(path)}  {os.path.basename(path)}\n")
+
+
+def resolve_artifact(name):
+    """
+    Find a model artifact (file or directory) in the local artifact dirs.
+
+    Empty placeholder files are skipped. Artifacts (files or directories)
+    with a known checksum are verified and a mismatch raises ValueError
+    rather than loading a corrupt or tampered model. Returns None when no
+    local copy exists.
+    """
+    for directory in artifact_dirs():
+        path = os.path.join(directory, name)
+        if not os.path.isdir(path) and (
+            not os.path.isfile(path) or os.path.getsize(path) == 0
+        ):
+            continue
+        expected = expected_checksum(path)
+        if expected is not None and sha256sum(path) != expected:
+            raise ValueError(f"Checksum mismatch for model artifact {path}")
+        return path
+    return None
+
+
+def cache_path(name):
+    """
+    Where to write a new artifact: always the cache dir, never app/models.
+    """
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    return os.path.join(MODEL_CACHE_DIR, name)
+
+
+def save_facenet(model):
+    """
+    Save InceptionResnetV1 weights (without the classifier head) to the cache.
+    """
+    import torch
+
+    path = cache_path(FACENET_WEIGHTS)
+    state = {k: v for k, v in model.state_dict().items() if not k.startswith("logits.")}
+    torch.save(state, path)
+    write_checksum(path)
+    return path
+
+
+def download_retinaface_weights():
+    """
+    Download the pre-trained RetinaFace weights into the cache.
+    """
+    import gdown
+
+    path = cache_path(RETINAFACE_WEIGHTS)
+    partial = path + ".part"  # Never leave a truncated download under the real name
+    gdown.download(RETINAFACE_WEIGHTS_URL, partial, quiet=False)
+    if not os.path.isfile(partial):
+        raise FileNotFoundError(
+            f"Could not download {RETINAFACE_WEIGHTS} from {RETINAFACE_WEIGHTS_URL}."
+        )
+    os.replace(partial, path)
+    write_checksum(path)
+    return path
+
+
+def export_facenet_torchscript(model):
+    """
+    Trace and freeze InceptionResnetV1 to TorchScript for fast reload.
+    """
+    import torch
+
+    path = cache_path(FACENET_TORCHSCRIPT)
+    with torch.inference_mode():
+        traced = torch.jit.trace(model.eval(), torch.zeros((1, 3, 160, 160)))
+    torch.jit.save(torch.jit.freeze(traced), path)
+    write_checksum(path)
+    return path
+
+
+def export_retinaface_saved_model(model):
+    """
+    Save the fully-initialized RetinaFace Keras model as a SavedModel.
+    """
+    path = cache_path(RETINAFACE_SAVED_MODEL)
+    model.save(path)
+    write_checksum(path)
+    return path
+
+
+def export_facenet_onnx(model):
+    """
+    Export InceptionResnetV1 to ONNX with a dynamic batch dimension.
+    """
+    import torch
+
+    path = cache_path(FACENET_ONNX)
+    torch.onnx.export(
+        model.eval(),
+        torch.zeros((1, 3, 160, 160)),
+        path,
+        input_names=["input"],
+        output_names=["embedding"],
+        dynamic_axes={"input": {0: "batch"}, "embedding": {0: "batch"}},
+        opset_version=17,
+    )
+    write_checksum(path)
+    return path
+
+
+def export_retinaface_onnx(model):
+    """
+    Export the RetinaFace Keras model to ONNX with dynamic batch and spatial dims.
+    """
+    import tensorflow as tf
+    import tf2onnx
+
+    path = cache_path(RETINAFACE_ONNX)
+    tf2onnx.convert.from_keras(
+        model,
+        input_signature=(tf.TensorSpec((None, None, None, 3), tf.float32, name="data"),),
+        opset=13,
+        output_path=path,
+    )
+    write_checksum(path)
+    return path
+
+
+if __name__ == "__main__":
+    # Populate the artifact cache for offline nodes: python -m app.models.artifacts
+    from app.factory import registry
+
+    facenet = registry.get("facenet")
+    print(f"Saved {save_facenet(facenet)}")
+    print(f"Saved {export_facenet_torchscript(facenet)}")
+    print(f"Saved {export_facenet_onnx(facenet)}")
+    retinaface = registry.get("retinaface")
+    print(f"Saved {export_retinaface_saved_model(retinaface)}")
+    print(f"Saved {export_retinaface_onnx(retinaface)}")
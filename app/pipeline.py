@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from app.utils.frame_utils import FramePool
+
+logger = logging.getLogger(__name__)
+
+
+class DropQueue:
+    """
+    Bounded queue that drops the oldest item when full.
+
+    With maxsize=1 this is a latest-frame-wins slot: a slow consumer always
+    gets the newest item and never works through a backlog of stale frames.
+    `on_drop` is called with every dropped item, e.g. to release its frame.
+    """
+
+    def __init__(self, maxsize=1, on_drop=None):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.on_drop = on_drop
+        self.dropped = 0
+
+    def put(self, item):
+        dropped = None
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+                dropped = self._items.popleft()
+            self._items.append(item)
+            self._cond.notify()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+
+    def get(self, timeout=None):
+        """
+        Return the oldest queued item, or None if nothing arrives in time.
+        """
+        with self._cond:
+            if not self._items and not self._cond.wait_for(lambda: self._items, timeout):
+                return None
+            return self._items.popleft()
+
+    def qsize(self):
+        return len(self._items)
+
+
+class StageStats:
+    """
+    Throughput of a pipeline stage, averaged over roughly one-second windows.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.fps = 0.0
+        self.count = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def tick(self):
+        self.count += 1
+        self._window_count += 1
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self.fps = self._window_count / elapsed
+            self._window_start = now
+            self._window_count = 0
+
+
+class Stage(threading.Thread):
+    """
+    Worker thread applying `fn` to items from `in_queue` and passing the
+    results to `out_queue`. Returning None from `fn` drops the item, passing
+    it to `on_drop` if given.
+    """
+
+    def __init__(self, name, fn, in_queue, out_queue, stop_event, on_drop=None):
+        super().__init__(name=name, daemon=True)
+        self.fn = fn
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.stop_event = stop_event
+        self.on_drop = on_drop
+        self.stats = StageStats(name)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            item = self.in_queue.get(timeout=0.1)
+            if item is None:
+                continue
+            try:
+                result = self.fn(item)
+            except Exception:
+                # A dead stage would silently stall the pipeline; stop it all
+                logger.exception("Stage %s failed, stopping the pipeline", self.name)
+                if self.on_drop is not None:
+                    self.on_drop(item)
+                self.stop_event.set()
+                break
+            self.stats.tick()
+            if result is not None:
+                self.out_queue.put(result)
+            elif self.on_drop is not None:
+                self.on_drop(item)
+
+
+class CaptureStage(threading.Thread):
+    """
+    Reads frames from a cv2.VideoCapture as fast as the camera delivers them,
+    as Frames whose buffers are recycled through `pool`. Whoever consumes a
+    frame last must release it.
+    """
+
+    def __init__(self, capture, out_queue, stop_event, pool=None):
+        super().__init__(name="capture", daemon=True)
+        self.capture = capture
+        self.out_queue = out_queue
+        self.stop_event = stop_event
+        self.pool = pool or FramePool()
+        self.stats = StageStats("capture")
+
+    def run(self):
+        while not self.stop_event.is_set():
+            frame = self.pool.frame()
+            ret = frame.read(self.capture)
+            if not ret:
+                frame.release()
+                print("Error: Unable to read from the camera.")
+                self.stop_event.set()
+                break
+            self.stats.tick()
+            self.out_queue.put({"frame": frame})
+
+
+def format_stats(stages, queues):
+    """
+    One-line summary of per-stage FPS and queue depth / drops.
+    """
+    parts = [f"{stage.stats.name} {stage.stats.fps:.1f}fps" for stage in stages]
+    parts += [f"{name} q={q.qsize()} drop={q.dropped}" for name, q in queues.items()]
+    return " | ".join(parts)
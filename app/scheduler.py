@@ -0,0 +1,111 @@
+import cv2
+import numpy as np
+
+from app.config import (
+    MESH_MAX_INTERVAL,
+    MOTION_PIXEL_DELTA,
+    MOTION_THRESHOLD,
+    RECOGNITION_MAX_INTERVAL,
+    RECOGNITION_MIN_INTERVAL,
+    SCENE_CHANGE_THRESHOLD,
+    SCHEDULER_THUMBNAIL_SIZE,
+)
+from app.face_recognition.alignment import detection_scale
+from app.utils.frame_utils import as_frame
+
+# Per-frame decisions, cheapest first
+SKIP = "skip"  # Reuse the previous frame's results
+MESH = "mesh"  # FaceMesh and tracking only; recognize new faces
+RECOGNIZE = "recognize"  # Full detection and recognition
+
+
+class MotionScheduler:
+    """
+    Decides how much work each realtime frame gets from cheap signals on a
+    small, blurred grayscale thumbnail:
+
+    - motion: fraction of thumbnail pixels that changed by more than
+      `pixel_delta` since the previous frame
+    - scene change: mean absolute difference (0-1) from the thumbnail at the
+      last full recognition
+
+    A frame is fully recognized when the scene changed and at least
+    `min_recognition_interval` frames passed, or unconditionally every
+    `max_recognition_interval` frames. Otherwise moving frames (and every
+    `max_mesh_interval`-th static frame) get FaceMesh only, and the rest are
+    skipped.
+    """
+
+    def __init__(
+        self,
+        thumbnail_size=SCHEDULER_THUMBNAIL_SIZE,
+        pixel_delta=MOTION_PIXEL_DELTA,
+        motion_threshold=MOTION_THRESHOLD,
+        scene_change_threshold=SCENE_CHANGE_THRESHOLD,
+        min_recognition_interval=RECOGNITION_MIN_INTERVAL,
+        max_recognition_interval=RECOGNITION_MAX_INTERVAL,
+        max_mesh_interval=MESH_MAX_INTERVAL,
+    ):
+        self.thumbnail_size = thumbnail_size
+        self.pixel_delta = pixel_delta
+        self.motion_threshold = motion_threshold
+        self.scene_change_threshold = scene_change_threshold
+        self.min_recognition_interval = min_recognition_interval
+        self.max_recognition_interval = max_recognition_interval
+        self.max_mesh_interval = max_mesh_interval
+        self.counts = {SKIP: 0, MESH: 0, RECOGNIZE: 0}
+        self.motion = 0.0
+        self.scene_change = 0.0
+        self._previous = None  # Thumbnail of the previous frame
+        self._shape = None  # Shape of the previous frame
+        self._reference = None  # Thumbnail at the last recognition
+        self._since_recognition = 0
+        self._since_mesh = 0
+
+    def thumbnail(self, frame):
+        frame = as_frame(frame)
+        gray = frame.downscaled(detection_scale(frame.shape, self.thumbnail_size), "gray")
+        return cv2.GaussianBlur(gray, (3, 3), 0)  # Suppress sensor noise
+
+    def decide(self, frame):
+        """
+        Return SKIP, MESH or RECOGNIZE for a BGR frame (array or Frame).
+        """
+        frame = as_frame(frame)
+        thumbnail = self.thumbnail(frame)
+        self._since_recognition += 1
+        self._since_mesh += 1
+
+        # Compare source shapes: different resolutions can share a thumbnail size
+        if self._previous is None or self._shape != frame.shape:
+            action = RECOGNIZE  # First frame, or the camera changed resolution
+        else:
+            diff = cv2.absdiff(thumbnail, self._previous)
+            self.motion = float(np.count_nonzero(diff > self.pixel_delta)) / diff.size
+            self.scene_change = float(cv2.absdiff(thumbnail, self._reference).mean()) / 255.0
+            action = self._action()
+
+        self._previous = thumbnail
+        self._shape = frame.shape
+        if action == RECOGNIZE:
+            self._reference = thumbnail
+            self._since_recognition = 0
+        if action != SKIP:
+            self._since_mesh = 0
+        self.counts[action] += 1
+        return action
+
+    def _action(self):
+        if self._since_recognition >= self.max_recognition_interval:
+            return RECOGNIZE
+        if (
+            self.scene_change >= self.scene_change_threshold
+            and self._since_recognition >= self.min_recognition_interval
+        ):
+            return RECOGNIZE
+        if self.motion >= self.motion_threshold or self._since_mesh >= self.max_mesh_interval:
+            return MESH
+        return SKIP
+
+    def summary(self):
+        return " ".join(f"{action}={count}" for action, count in self.counts.items())
@@ -0,0 +1,101 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from app.exceptions import ServiceOverloadedError
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item calls into batched handler calls.
+
+    Callers submit one item each and block on its result. A background thread
+    collects items until `max_batch_size` are waiting or `max_wait_ms` has
+    passed since the first one arrived, calls `handler(items)` once, and fans
+    the returned list (one result per item, in order) back to the callers.
+    An exception instance in that list fails only its own caller; an
+    exception raised by the handler fails the whole batch. Items whose future
+    was cancelled before their batch started are skipped.
+    """
+
+    def __init__(self, handler, max_batch_size=16, max_wait_ms=5, max_queue=64):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue = max_queue
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="micro-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        """
+        Queue an item and return a future for its result. Raises
+        ServiceOverloadedError when `max_queue` items are already waiting.
+        """
+        if self._queue.qsize() >= self.max_queue:
+            raise ServiceOverloadedError("Too many searches waiting, try again later")
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item):
+        """
+        Queue an item and block until its batch has been processed.
+        """
+        return self.submit(item).result()
+
+    def _collect(self):
+        batch = []
+        while not batch:
+            self._take(self._queue.get(), batch)
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                self._take(self._queue.get(timeout=remaining), batch)
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _take(entry, batch):
+        """
+        Add a queued (item, future) to the batch unless its caller already
+        cancelled it. Running futures can no longer be cancelled.
+        """
+        if entry[1].set_running_or_notify_cancel():
+            batch.append(entry)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._process(batch)
+            except Exception as e:
+                # Never let one batch kill the only worker thread
+                logger.exception("Micro-batch of %d items failed", len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _process(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            results = self.handler(items)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,221 @@
+import csv
+import io
+import os
+import queue
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+MANIFEST_NAME = "manifest.csv"
+
+_DONE = object()  # End-of-stream marker passed between stages
+
+
+def read_archive(source):
+    """
+    Yield (name, image_bytes) pairs from a zip archive of enrollment photos.
+
+    `source` is a path or a seekable binary file object (e.g. an upload's
+    spooled temporary file); entries are read one at a time as the pipeline
+    consumes them, so the archive is never held in memory as a whole.
+
+    If the archive contains a manifest.csv with `filename,name` rows, names are
+    taken from it; otherwise each photo is named after its file stem.
+    """
+    with zipfile.ZipFile(source) as archive:
+        names = {}
+        if MANIFEST_NAME in archive.namelist():
+            with archive.open(MANIFEST_NAME) as manifest:
+                reader = csv.DictReader(io.TextIOWrapper(manifest, encoding="utf-8"))
+                names = {row["filename"]: row["name"] for row in reader}
+
+        for entry in archive.infolist():
+            if entry.is_dir() or not entry.filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            if names:
+                if entry.filename not in names:
+                    continue
+                name = names[entry.filename]
+            else:
+                name = os.path.splitext(os.path.basename(entry.filename))[0]
+            yield name, archive.read(entry)
+
+
+class EnrollmentPipeline:
+    """
+    Streams enrollment photos through decode -> detect -> embed -> insert.
+
+    Each stage runs on its own thread (decoding on a small pool) connected by
+    bounded queues, so detecting one batch of photos overlaps with decoding
+    the next and with embedding/inserting earlier ones. Per-item failures are
+    collected and reported without aborting the batch.
+    """
+
+    def __init__(
+        self,
+        detector,
+        recognizer,
+        db,
+        decode_workers=4,
+        batch_size=32,
+        insert_chunk_size=256,
+        queue_size=64,
+    ):
+        self.detector = detector
+        self.recognizer = recognizer
+        self.db = db
+        self.decode_workers = decode_workers
+        self.batch_size = batch_size
+        self.insert_chunk_size = insert_chunk_size
+        self.queue_size = queue_size
+
+    def run(self, items):
+        """
+        Enroll an iterable of (name, image_bytes) pairs.
+
+        Returns {"added": count, "failed": [{"index", "name", "error"}, ...]}.
+        """
+        failures = []
+        errors = []
+        decoded = queue.Queue(maxsize=self.queue_size)
+        detected = queue.Queue(maxsize=self.queue_size)
+        embedded = queue.Queue(maxsize=self.queue_size)
+
+        stages = [
+            threading.Thread(target=self._decode_stage, args=(items, decoded, failures, errors)),
+            threading.Thread(target=self._detect_stage, args=(decoded, detected, failures)),
+            threading.Thread(target=self._embed_stage, args=(detected, embedded, failures)),
+        ]
+        for stage in stages:
+            stage.start()
+        added = self._insert_stage(embedded, failures)
+        for stage in stages:
+            stage.join()
+        if errors:
+            # Reading the input itself failed (e.g. a corrupt archive)
+            raise errors[0]
+
+        failures.sort(key=lambda failure: failure["index"])
+        return {"added": added, "failed": failures}
+
+    @staticmethod
+    def _decode(data):
+        return Image.open(io.BytesIO(data)).convert("RGB")
+
+    def _decode_stage(self, items, out_queue, failures, errors):
+        # Keep a bounded window of in-flight decodes and emit them in order
+        with ThreadPoolExecutor(max_workers=self.decode_workers) as pool:
+            pending = deque()
+
+            def emit_oldest():
+                index, name, future = pending.popleft()
+                try:
+                    out_queue.put((index, name, future.result()))
+                except Exception as e:
+                    failures.append(_failure(index, name, f"Invalid image file: {e}"))
+
+            try:
+                for index, (name, data) in enumerate(items):
+                    pending.append((index, name, pool.submit(self._decode, data)))
+                    if len(pending) >= self.queue_size:
+                        emit_oldest()
+                while pending:
+                    emit_oldest()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                # Always terminate the stream so downstream stages can exit
+                out_queue.put(_DONE)
+
+    def _detect_stage(self, in_queue, out_queue, failures):
+        done = False
+        while not done:
+            # Wait for the next photo, then take whatever else has already been
+            # decoded (up to batch_size) so detection runs as one batch
+            batch = []
+            item = in_queue.get()
+            while item is not _DONE:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = in_queue.get_nowait()
+                except queue.Empty:
+                    break
+            done = item is _DONE
+            if batch:
+                self._detect_batch(batch, out_queue, failures)
+        out_queue.put(_DONE)
+
+    def _detect_batch(self, batch, out_queue, failures):
+        try:
+            detected = self.detector.detect_faces_batch([image for _, _, image in batch])
+        except Exception:
+            # Fall back to one photo at a time to find the one that fails
+            detected = []
+            for index, name, image in batch:
+                try:
+                    detected.append(self.detector.detect_faces(image))
+                except Exception as e:
+                    failures.append(_failure(index, name, str(e)))
+                    detected.append(None)
+
+        for (index, name, image), boxes in zip(batch, detected):
+            if boxes is None:
+                continue  # Detection failed, error already recorded
+            if not boxes:
+                failures.append(_failure(index, name, "No face detected in the image."))
+                continue
+            try:
+                # Use the first detected face
+                out_queue.put((index, name, self.detector.crop_faces(image, boxes[:1])[0]))
+            except Exception as e:
+                failures.append(_failure(index, name, str(e)))
+
+    def _embed_stage(self, in_queue, out_queue, failures):
+        batch = []
+        while True:
+            item = in_queue.get()
+            if item is not _DONE:
+                batch.append(item)
+            if batch and (item is _DONE or len(batch) >= self.batch_size):
+                try:
+                    embeddings = self.recognizer.generate_embeddings(
+                        [face for _, _, face in batch]
+                    )
+                    for (index, name, _), embedding in zip(batch, embeddings):
+                        out_queue.put((index, name, embedding))
+                except Exception as e:
+                    failures.extend(_failure(index, name, str(e)) for index, name, _ in batch)
+                batch = []
+            if item is _DONE:
+                break
+        out_queue.put(_DONE)
+
+    def _insert_stage(self, in_queue, failures):
+        added = 0
+        chunk = []
+        while True:
+            item = in_queue.get()
+            if item is not _DONE:
+                chunk.append(item)
+            if chunk and (item is _DONE or len(chunk) >= self.insert_chunk_size):
+                try:
+                    self.db.insert_employees(
+                        [name for _, name, _ in chunk],
+                        [embedding.tolist() for _, _, embedding in chunk],
+                    )
+                    added += len(chunk)
+                except Exception as e:
+                    failures.extend(_failure(index, name, str(e)) for index, name, _ in chunk)
+                chunk = []
+            if item is _DONE:
+                return added
+
+
+def _failure(index, name, error):
+    return {"index": index, "name": name, "error": error}
@@ -1,6 +1,22 @@
+from PIL import Image
 from app.client.user_client import UserClient
+from app.config import (
+    EMBEDDING_CACHE_BYTES,
+    EMBEDDING_CACHE_ENTRIES,
+    EMBEDDING_CACHE_TTL_SECONDS,
+    ENROLLMENT_BATCH_SIZE,
+    ENROLLMENT_DECODE_WORKERS,
+    ENROLLMENT_INSERT_CHUNK,
+    ENROLLMENT_QUEUE_SIZE,
+    SEARCH_BATCH_SIZE,
+    SEARCH_BATCH_WAIT_MS,
+    SEARCH_MAX_QUEUE,
+)
 from app.face_recognition.detection import FaceDetector
 from app.face_recognition.recognition import FaceRecognizer
+from app.service.batching import MicroBatcher
+from app.service.enrollment import EnrollmentPipeline, read_archive
+from app.utils.cache_utils import EmbeddingCache
 
 
 class UserService:
@@ -8,21 +24,69 @@ class UserService:
         self.db = UserClient()
         self.detector = FaceDetector()
         self.recognizer = FaceRecognizer()
+        self.embedding_cache = EmbeddingCache(
+            max_entries=EMBEDDING_CACHE_ENTRIES,
+            max_bytes=EMBEDDING_CACHE_BYTES,
+            ttl_seconds=EMBEDDING_CACHE_TTL_SECONDS,
+        )
+        self.search_batcher = MicroBatcher(
+            self.search_employees,
+            max_batch_size=SEARCH_BATCH_SIZE,
+            max_wait_ms=SEARCH_BATCH_WAIT_MS,
+            max_queue=SEARCH_MAX_QUEUE,
+        )
 
     def add_employee(self, name: str, image: Image.Image):
         """
         Detect face, generate embedding, and add an employee to the database.
         """
-        boxes = self.detector.detect_faces(image)
-        if not boxes:
+        embedding = self._embed_first_face(image)
+        if embedding is None:
             return "No face detected in the image."
 
-        # Use the first detected face
-        cropped_faces = self.detector.crop_faces(image, boxes)
-        embedding = self.recognizer.generate_embedding(cropped_faces[0])
         self.db.insert_employee(name, embedding.tolist())
         return f"Employee {name} added successfully."
 
+    def _embed_first_face(self, image: Image.Image):
+        """
+        Embedding of the first face in an image, or None if there is no face.
+        Repeated uploads of the same image are served from the cache.
+        """
+        key = self.embedding_cache.image_key(image)
+        hit, embedding = self.embedding_cache.lookup(key)
+        if hit:
+            return embedding
+
+        boxes = self.detector.detect_faces(image)
+        if boxes:
+            # Use the first detected face
+            cropped_faces = self.detector.crop_faces(image, boxes[:1])
+            embedding = self.recognizer.generate_embedding(cropped_faces[0])
+        self.embedding_cache.put(key, embedding)
+        return embedding
+
+    def add_employees(self, items):
+        """
+        Enroll many employees from an iterable of (name, image_bytes) pairs.
+        """
+        pipeline = EnrollmentPipeline(
+            self.detector,
+            self.recognizer,
+            self.db,
+            decode_workers=ENROLLMENT_DECODE_WORKERS,
+            batch_size=ENROLLMENT_BATCH_SIZE,
+            insert_chunk_size=ENROLLMENT_INSERT_CHUNK,
+            queue_size=ENROLLMENT_QUEUE_SIZE,
+        )
+        return pipeline.run(items)
+
+    def add_employees_from_archive(self, archive):
+        """
+        Enroll every photo in a zip archive, given as a path or binary file
+        object (see enrollment.read_archive).
+        """
+        return self.add_employees(read_archive(archive))
+
     def list_employees(self):
         """
         List all employees.
@@ -39,12 +103,99 @@ class UserService:
     def search_employee(self, image: Image.Image):
         """
         Detect face, generate embedding, and search for an employee.
+
+        Concurrent calls are coalesced by the micro-batcher into a single
+        search_employees call.
         """
-        boxes = self.detector.detect_faces(image)
-        if not boxes:
-            return {"name": "No face detected", "distance": None}
+        return self.search_batcher(image)
 
-        # Use the first detected face
-        cropped_faces = self.detector.crop_faces(image, boxes)
-        embedding = self.recognizer.generate_embedding(cropped_faces[0])
-        return self.db.search_employee(embedding)
+    def submit_search(self, image: Image.Image):
+        """
+        Non-blocking search_employee: queue the image on the micro-batcher and
+        return a concurrent.futures.Future for its result.
+        """
+        return self.search_batcher.submit(image)
+
+    def search_employees(self, images: list):
+        """
+        Search for the employee in each image with one batched embedding pass
+        and one multi-vector Milvus search.
+
+        Failures are isolated per image: an image whose processing fails gets
+        the exception in its slot of the returned list (which the
+        micro-batcher raises for that caller only) instead of failing the
+        whole batch.
+        """
+        results = [None] * len(images)
+        embeddings = [None] * len(images)
+        faces = []
+        positions = []
+        keys = [None] * len(images)
+        misses = []
+        for i, image in enumerate(images):
+            try:
+                keys[i] = self.embedding_cache.image_key(image)
+                hit, embeddings[i] = self.embedding_cache.lookup(keys[i])
+            except Exception as e:
+                results[i] = e
+                continue
+            if not hit:
+                misses.append(i)
+
+        # Detect faces in every uncached image as one batch, falling back to
+        # one image at a time to find the one that fails
+        try:
+            detected = self.detector.detect_faces_batch([images[i] for i in misses])
+        except Exception:
+            detected = []
+            for i in misses:
+                try:
+                    detected.append(self.detector.detect_faces(images[i]))
+                except Exception as e:
+                    results[i] = e
+                    detected.append(None)
+
+        for i, boxes in zip(misses, detected):
+            if boxes is None:
+                continue  # Detection failed, error already recorded
+            if not boxes:
+                self.embedding_cache.put(keys[i], None)
+                continue
+            try:
+                # Use the first detected face
+                faces.append(self.detector.crop_faces(images[i], boxes[:1])[0])
+                positions.append(i)
+            except Exception as e:
+                results[i] = e
+
+        if faces:
+            try:
+                for i, embedding in zip(positions, self.recognizer.generate_embeddings(faces)):
+                    embeddings[i] = embedding.copy()  # Don't pin the whole batch in the cache
+                    self.embedding_cache.put(keys[i], embeddings[i])
+            except Exception as e:
+                for i in positions:
+                    results[i] = e
+
+        found = []
+        for i in range(len(images)):
+            if results[i] is not None:
+                continue
+            if embeddings[i] is None:
+                results[i] = {"name": "No face detected", "distance": None}
+            else:
+                found.append(i)
+        if found:
+            try:
+                matches = self.db.search_employees([embeddings[i].tolist() for i in found])
+            except Exception as e:
+                matches = [e] * len(found)
+            for i, match in zip(found, matches):
+                results[i] = match
+        return results
+
+    def cache_stats(self):
+        """
+        Hit/miss counters and size of the embedding cache.
+        """
+        return self.embedding_cache.stats()
@@ -0,0 +1,46 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from app.exceptions import ServiceOverloadedError
+
+
+class BoundedExecutor:
+    """
+    Runs blocking calls on a fixed-size thread pool without blocking the event loop.
+
+    At most `max_workers` calls run at once and at most `max_queue` more may
+    wait for a worker; anything beyond that is rejected immediately with
+    ServiceOverloadedError instead of queueing without bound.
+    """
+
+    def __init__(self, max_workers, max_queue, name="inference"):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self.name = name
+        self.capacity = max_workers + max_queue
+        self.pending = 0
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run `fn(*args, **kwargs)` on the pool and await its result.
+        """
+        if self.pending >= self.capacity:
+            raise ServiceOverloadedError(
+                f"{self.name.capitalize()} queue is full ({self.pending} pending requests)."
+            )
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(fn, *args, **kwargs)
+            )
+        finally:
+            self.pending -= 1
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting work and release the worker threads.
+        """
+        self._executor.shutdown(wait=wait)
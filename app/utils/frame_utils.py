@@ -0,0 +1,125 @@
+import threading
+
+import cv2
+import numpy as np
+
+
+class Frame:
+    """
+    A video frame plus lazily computed views of it: RGB, grayscale and
+    downscaled copies are converted at most once per frame, into buffers that
+    are reused across frames when the Frame comes from a FramePool.
+
+    Stages should read `frame.rgb` / `frame.gray` / `frame.downscaled(...)`
+    instead of converting `frame.bgr` themselves. The last owner of a pooled
+    Frame calls `release()`; the frame and its views are invalid afterwards.
+    """
+
+    def __init__(self, bgr=None, buffers=None, pool=None):
+        self._buffers = {} if buffers is None else buffers
+        self._views = {}
+        self._pool = pool
+        self.bgr = bgr
+
+    def release(self):
+        """
+        Return this frame's buffers to its pool (no-op for unpooled frames
+        and on repeated calls).
+        """
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            self._views.clear()
+            self.bgr = None
+            pool._release(self._buffers)
+
+    def read(self, capture):
+        """
+        Read the next frame from a cv2.VideoCapture into the reused BGR buffer.
+        Returns False when no frame could be read.
+        """
+        ok, image = capture.read(self._buffers.get("bgr"))
+        if ok:
+            self._buffers["bgr"] = image
+            self.bgr = image
+            self._views.clear()
+        return ok
+
+    @property
+    def shape(self):
+        return self.bgr.shape
+
+    def _buffer(self, name, shape):
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = self._buffers[name] = np.empty(shape, dtype=np.uint8)
+        return buffer
+
+    @property
+    def rgb(self):
+        if "rgb" not in self._views:
+            self._views["rgb"] = cv2.cvtColor(
+                self.bgr, cv2.COLOR_BGR2RGB, dst=self._buffer("rgb", self.bgr.shape)
+            )
+        return self._views["rgb"]
+
+    @property
+    def gray(self):
+        if "gray" not in self._views:
+            self._views["gray"] = cv2.cvtColor(
+                self.bgr, cv2.COLOR_BGR2GRAY, dst=self._buffer("gray", self.bgr.shape[:2])
+            )
+        return self._views["gray"]
+
+    def downscaled(self, scale, color="rgb"):
+        """
+        The `color` view ("bgr", "rgb" or "gray") resized by `scale` (< 1).
+        """
+        if scale >= 1.0:
+            return getattr(self, color)
+        key = f"{color}@{scale}"
+        if key not in self._views:
+            source = getattr(self, color)
+            height, width = source.shape[:2]
+            size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+            buffer = self._buffer(key, (size[1], size[0]) + source.shape[2:])
+            self._views[key] = cv2.resize(source, size, dst=buffer, interpolation=cv2.INTER_AREA)
+        return self._views[key]
+
+
+class FramePool:
+    """
+    Buffer sets for up to `depth` frames alive at once. A slot is handed out
+    by `frame()` and only reused after that Frame is released, so no stage
+    ever sees its frame overwritten. When every slot is in use, `frame()`
+    returns an unpooled Frame with fresh buffers instead of blocking.
+    """
+
+    def __init__(self, depth=8):
+        self.depth = depth
+        self._free = [{} for _ in range(depth)]
+        self._lock = threading.Lock()
+
+    def frame(self, bgr=None):
+        with self._lock:
+            buffers = self._free.pop() if self._free else None
+        if buffers is None:
+            return Frame(bgr)
+        return Frame(bgr, buffers, pool=self)
+
+    def available(self):
+        """
+        Number of free slots.
+        """
+        with self._lock:
+            return len(self._free)
+
+    def _release(self, buffers):
+        with self._lock:
+            self._free.append(buffers)
+
+
+def as_frame(image):
+    """
+    Wrap a BGR array in a Frame; Frames are returned as-is.
+    """
+    return image if isinstance(image, Frame) else Frame(image)
@@ -0,0 +1,162 @@
+import threading
+
+import cv2
+import numpy as np
+
+from model.retinaface_postprocess import decode_detections
+
+# (height, width) input resolutions images are letterboxed into
+DEFAULT_BUCKETS = ((320, 320), (480, 640), (640, 640), (720, 1280), (1080, 1920))
+
+
+class RetinaFaceRunner:
+    """
+    Batched, fixed-shape RetinaFace inference
+    Images are letterboxed (scaled to fit, padded bottom/right) into a small
+    set of bucket resolutions. Each bucket gets one compiled concrete function
+    with a static spatial shape, so varying image sizes never cause
+    retracing, and images sharing a bucket run through it as one batch.
+    The runner is shared across threads: letterbox buffers are per thread and
+    functions are built once under a lock.
+    """
+
+    def __init__(
+        self,
+        model,
+        buckets=DEFAULT_BUCKETS,
+        max_batch_size: int = 8,
+        threshold: float = 0.9,
+        nms_threshold: float = 0.4,
+        jit_compile: bool = False,
+    ):
+        self.model = model
+        self.buckets = sorted(buckets, key=lambda bucket: bucket[0] * bucket[1])
+        self.max_batch_size = max_batch_size
+        self.threshold = threshold
+        self.nms_threshold = nms_threshold
+        self.jit_compile = jit_compile
+        self._functions = {}
+        self._functions_lock = threading.Lock()
+        self._local = threading.local()  # Per-thread letterbox buffers
+
+    def bucket_for(self, height: int, width: int) -> tuple:
+        """
+        Smallest bucket the image fits without downscaling, else the largest
+        """
+        for bucket in self.buckets:
+            if height <= bucket[0] and width <= bucket[1]:
+                return bucket
+        return self.buckets[-1]
+
+    def _function(self, bucket):
+        import tensorflow as tf
+
+        function = self._functions.get(bucket)
+        if function is None:
+            with self._functions_lock:
+                function = self._functions.get(bucket)
+                if function is None:
+                    height, width = bucket
+                    function = tf.function(
+                        lambda x: self.model(x, training=False),
+                        input_signature=[tf.TensorSpec([None, height, width, 3], tf.float32)],
+                        jit_compile=self.jit_compile,
+                    ).get_concrete_function()
+                    self._functions[bucket] = function
+        return function
+
+    def _input_buffer(self, bucket, count):
+        inputs = getattr(self._local, "inputs", None)
+        if inputs is None:
+            inputs = self._local.inputs = {}
+        buffer = inputs.get(bucket)
+        if buffer is None or len(buffer) < count:
+            buffer = np.empty((self.max_batch_size, *bucket, 3), dtype=np.float32)
+            inputs[bucket] = buffer
+        return buffer[:count]
+
+    def _run(self, bucket, batch: np.ndarray) -> list:
+        """
+        Run one letterboxed batch and return the nine raw outputs
+        """
+        return self._function(bucket)(batch)
+
+    def warmup(self):
+        """
+        Trace and compile every bucket ahead of the first request
+        """
+        for bucket in self.buckets:
+            self._run(bucket, np.zeros((1, *bucket, 3), dtype=np.float32))
+
+    def detect(self, images: list) -> list:
+        """
+        Detect faces in a list of RGB uint8 images of any size
+        Returns:
+            detections (list): per image, boxes [N, 4], scores [N] and
+                landmarks [N, 5, 2] in that image's pixel coordinates
+        """
+        detections = [None] * len(images)
+        groups = {}
+        for index, image in enumerate(images):
+            groups.setdefault(self.bucket_for(*image.shape[:2]), []).append(index)
+
+        for bucket, indices in groups.items():
+            for start in range(0, len(indices), self.max_batch_size):
+                chunk = indices[start : start + self.max_batch_size]
+                batch = self._input_buffer(bucket, len(chunk))
+                scales = []
+                for slot, index in enumerate(chunk):
+                    scales.append(self._letterbox(images[index], batch[slot]))
+
+                outputs = self._run(bucket, batch)
+                decoded = decode_detections(
+                    outputs,
+                    image_shape=bucket,
+                    threshold=self.threshold,
+                    nms_threshold=self.nms_threshold,
+                )
+                for index, scale, (boxes, scores, landmarks) in zip(chunk, scales, decoded):
+                    height, width = images[index].shape[:2]
+                    boxes = np.clip(boxes / scale, 0, (width - 1, height - 1) * 2)
+                    detections[index] = (boxes, scores, landmarks / scale)
+        return detections
+
+    @staticmethod
+    def _letterbox(image: np.ndarray, out: np.ndarray) -> float:
+        """
+        Resize an image into the top-left of `out` keeping its aspect ratio
+        and zero the padding. Returns the scale factor applied.
+        """
+        height, width = image.shape[:2]
+        scale = min(out.shape[0] / height, out.shape[1] / width, 1.0)
+        new_height = max(1, int(round(height * scale)))
+        new_width = max(1, int(round(width * scale)))
+        if scale != 1.0:
+            image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
+        out[:new_height, :new_width] = image
+        out[new_height:] = 0
+        out[:new_height, new_width:] = 0
+        return scale
+
+
+class OnnxRetinaFaceRunner(RetinaFaceRunner):
+    """
+    RetinaFaceRunner executing an exported ONNX graph with ONNX Runtime on CPU
+    instead of TensorFlow; bucketing, batching and decoding are unchanged.
+    """
+
+    def __init__(self, model_path: str, intra_op_threads: int = 0, inter_op_threads: int = 0, **kwargs):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+        super().__init__(session, **kwargs)
+        self.input_name = session.get_inputs()[0].name
+
+    def _run(self, bucket, batch: np.ndarray) -> list:
+        return self.model.run(None, {self.input_name: batch})
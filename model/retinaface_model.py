@@ -1,6 +1,5 @@
 import os
 from pathlib import Path
-import gdown
 import tensorflow as tf
 from retinaface.commons.logger import Logger
 
@@ -43,15 +42,22 @@ else:
     )
 
 
-def load_weights(model: Model):
+def load_weights(model: Model, weights_path: str = None, allow_download: bool = True):
     """
     Loading pre-trained weights for the RetinaFace model
     Args:
         model (Model): retinaface model structure with randon weights
+        weights_path (str): local retinaface.h5 to load instead of the
+            ~/.deepface cache (e.g. from an offline artifact directory)
+        allow_download (bool): fetch the weights when no local copy exists
     Returns:
         model (Model): retinaface model with its structure and pre-trained weights
 
     """
+    if weights_path is not None:
+        model.load_weights(weights_path)
+        return model
+
     home = str(os.getenv("DEEPFACE_HOME", default=str(Path.home())))
 
     exact_file = home + "/.deepface/weights/retinaface.h5"
@@ -59,17 +65,25 @@ def load_weights(model: Model):
 
     # -----------------------------
 
-    if not os.path.exists(home + "/.deepface"):
-        os.mkdir(home + "/.deepface")
-        logger.info(f"Directory {home}/.deepface created")
+    if os.path.isfile(exact_file) is not True:
+        if not allow_download:
+            raise ValueError(
+                f"Pre-trained weight not found at {exact_file} and downloads are disabled."
+                + " Copy retinaface.h5 from "
+                + url
+                + " into the model artifact directory."
+            )
 
-    if not os.path.exists(home + "/.deepface/weights"):
-        os.mkdir(home + "/.deepface/weights")
-        logger.info(f"Directory {home}/.deepface/weights created")
+        if not os.path.exists(home + "/.deepface"):
+            os.mkdir(home + "/.deepface")
+            logger.info(f"Directory {home}/.deepface created")
 
-    # -----------------------------
+        if not os.path.exists(home + "/.deepface/weights"):
+            os.mkdir(home + "/.deepface/weights")
+            logger.info(f"Directory {home}/.deepface/weights created")
+
+        import gdown
 
-    if os.path.isfile(exact_file) is not True:
         logger.info(f"retinaface.h5 will be downloaded from the url {url}")
         gdown.download(url, exact_file, quiet=False)
 
@@ -82,9 +96,9 @@ def load_weights(model: Model):
             "Pre-trained weight could not be loaded!"
             + " You might try to download the pre-trained weights from the url "
             + url
-            + " and copy it to the ",
-            exact_file,
-            "manually.",
+            + " and copy it to "
+            + exact_file
+            + " manually."
         )
 
     model.load_weights(exact_file)
@@ -92,9 +106,12 @@ def load_weights(model: Model):
     return model
 
 
-def build_model() -> Model:
+def build_model(weights_path: str = None, allow_download: bool = True) -> Model:
     """
     Build RetinaFace model
+    Args:
+        weights_path (str): local retinaface.h5; see load_weights
+        allow_download (bool): fetch the weights when no local copy exists
     """
     data = Input(dtype=tf.float32, shape=(None, None, 3), name="data")
 
@@ -1511,6 +1528,6 @@ def build_model() -> Model:
             face_rpn_landmark_pred_stride8,
         ],
     )
-    model = load_weights(model)
+    model = load_weights(model, weights_path=weights_path, allow_download=allow_download)
 
     return model
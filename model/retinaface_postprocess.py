@@ -0,0 +1,172 @@
+import functools
+
+import numpy as np
+
+# pylint: disable=too-many-locals
+
+# RetinaFace anchor configuration, matching the strides of build_model outputs
+
+FEAT_STRIDES = (32, 16, 8)
+
+BASE_ANCHORS = {
+    32: np.array([[-248.0, -248.0, 263.0, 263.0], [-120.0, -120.0, 135.0, 135.0]], dtype=np.float32),
+    16: np.array([[-56.0, -56.0, 71.0, 71.0], [-24.0, -24.0, 39.0, 39.0]], dtype=np.float32),
+    8: np.array([[-8.0, -8.0, 23.0, 23.0], [0.0, 0.0, 15.0, 15.0]], dtype=np.float32),
+}
+
+NUM_ANCHORS = 2
+
+
+def anchors_plane(height: int, width: int, stride: int) -> np.ndarray:
+    """
+    Anchors for every cell of one feature map
+    Args:
+        height (int): feature map height
+        width (int): feature map width
+        stride (int): feature stride in input pixels
+    Returns:
+        anchors (np.ndarray): [height * width * NUM_ANCHORS, 4] boxes, ordered
+            like a row-major reshape of the model's per-stride outputs
+    """
+    shift_x, shift_y = np.meshgrid(
+        np.arange(width, dtype=np.float32) * stride, np.arange(height, dtype=np.float32) * stride
+    )
+    shifts = np.stack([shift_x, shift_y, shift_x, shift_y], axis=-1)
+    anchors = shifts[:, :, np.newaxis, :] + BASE_ANCHORS[stride][np.newaxis, np.newaxis]
+    return anchors.reshape(-1, 4)
+
+
+@functools.lru_cache(maxsize=32)
+def anchors_for_feature_maps(feature_shapes: tuple) -> np.ndarray:
+    """
+    All anchors for one input resolution, concatenated over strides 32, 16, 8
+    Args:
+        feature_shapes (tuple): ((height, width), ...) of each stride's feature map
+    Returns:
+        anchors (np.ndarray): [total_anchors, 4], read-only and cached per resolution
+    """
+    anchors = np.concatenate(
+        [
+            anchors_plane(height, width, stride)
+            for (height, width), stride in zip(feature_shapes, FEAT_STRIDES)
+        ]
+    )
+    anchors.setflags(write=False)
+    return anchors
+
+
+def bbox_pred(anchors: np.ndarray, deltas: np.ndarray) -> np.ndarray:
+    """
+    Apply (dx, dy, dw, dh) regression deltas to anchors
+    """
+    widths = anchors[:, 2] - anchors[:, 0] + 1.0
+    heights = anchors[:, 3] - anchors[:, 1] + 1.0
+    ctr_x = anchors[:, 0] + 0.5 * (widths - 1.0)
+    ctr_y = anchors[:, 1] + 0.5 * (heights - 1.0)
+
+    pred_ctr_x = deltas[:, 0] * widths + ctr_x
+    pred_ctr_y = deltas[:, 1] * heights + ctr_y
+    pred_w = np.exp(deltas[:, 2]) * widths
+    pred_h = np.exp(deltas[:, 3]) * heights
+
+    return np.stack(
+        [
+            pred_ctr_x - 0.5 * (pred_w - 1.0),
+            pred_ctr_y - 0.5 * (pred_h - 1.0),
+            pred_ctr_x + 0.5 * (pred_w - 1.0),
+            pred_ctr_y + 0.5 * (pred_h - 1.0),
+        ],
+        axis=1,
+    )
+
+
+def landmark_pred(anchors: np.ndarray, deltas: np.ndarray) -> np.ndarray:
+    """
+    Decode [N, 5, 2] landmark deltas relative to their anchors
+    """
+    widths = anchors[:, 2] - anchors[:, 0] + 1.0
+    heights = anchors[:, 3] - anchors[:, 1] + 1.0
+    centers = np.stack(
+        [anchors[:, 0] + 0.5 * (widths - 1.0), anchors[:, 1] + 0.5 * (heights - 1.0)], axis=1
+    )
+    sizes = np.stack([widths, heights], axis=1)
+    return deltas * sizes[:, np.newaxis, :] + centers[:, np.newaxis, :]
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Greedy non-maximum suppression
+    Args:
+        boxes (np.ndarray): [N, 4] boxes (x1, y1, x2, y2)
+        scores (np.ndarray): [N] scores
+        threshold (float): IoU above which the lower-scoring box is dropped
+    Returns:
+        keep (np.ndarray): indices of the kept boxes, by descending score
+    """
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1 + 1) * (y2 - y1 + 1)
+    order = np.argsort(-scores)
+
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]) + 1)
+        h = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]) + 1)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter)
+        order = rest[iou <= threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def decode_detections(
+    outputs: list,
+    image_shape: tuple = None,
+    threshold: float = 0.9,
+    nms_threshold: float = 0.4,
+    scale: float = 1.0,
+) -> list:
+    """
+    Turn the nine raw build_model outputs into faces for every image in the batch
+    Args:
+        outputs (list): [cls_prob, bbox_pred, landmark_pred] for strides 32, 16, 8,
+            each shaped [batch, height, width, channels]
+        image_shape (tuple): (height, width) of the network input, to clip boxes
+        threshold (float): minimum face probability
+        nms_threshold (float): IoU threshold for non-maximum suppression
+        scale (float): input resize factor; coordinates are divided by it so
+            they refer to the original image
+    Returns:
+        detections (list): per image, a tuple of boxes [N, 4], scores [N] and
+            landmarks [N, 5, 2], sorted by descending score
+    """
+    outputs = [np.asarray(output) for output in outputs]
+    cls_probs, bbox_deltas, landmark_deltas = outputs[0::3], outputs[1::3], outputs[2::3]
+    anchors = anchors_for_feature_maps(tuple(tuple(out.shape[1:3]) for out in bbox_deltas))
+
+    detections = []
+    for b in range(len(outputs[0])):
+        # Only the face-class probabilities (last NUM_ANCHORS channels)
+        scores = np.concatenate([prob[b, :, :, NUM_ANCHORS:].reshape(-1) for prob in cls_probs])
+        keep = np.flatnonzero(scores >= threshold)
+
+        deltas = np.concatenate([delta[b].reshape(-1, 4) for delta in bbox_deltas])[keep]
+        points = np.concatenate([delta[b].reshape(-1, 5, 2) for delta in landmark_deltas])[keep]
+        boxes = bbox_pred(anchors[keep], deltas)
+        landmarks = landmark_pred(anchors[keep], points)
+        scores = scores[keep]
+
+        if image_shape is not None:
+            height, width = image_shape[:2]
+            boxes = np.clip(boxes, 0, (width - 1, height - 1, width - 1, height - 1))
+
+        order = nms(boxes, scores, nms_threshold)
+        detections.append(
+            (
+                (boxes[order] / scale).astype(np.float32),
+                scores[order].astype(np.float32),
+                (landmarks[order] / scale).astype(np.float32),
+            )
+        )
+    return detections
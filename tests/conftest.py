@@ -0,0 +1,34 @@
+import sys
+import types
+from unittest import mock
+
+import pytest
+
+
+class FakeMilvusException(Exception):
+    pass
+
+
+@pytest.fixture
+def fake_pymilvus(monkeypatch):
+    """
+    Replace pymilvus with mocks and return the fake module. Modules that
+    import pymilvus are re-imported by the test against the fake.
+    """
+    pymilvus = types.ModuleType("pymilvus")
+    exceptions = types.ModuleType("pymilvus.exceptions")
+    exceptions.MilvusException = FakeMilvusException
+    for name in ("connections", "utility", "Collection", "CollectionSchema", "FieldSchema", "DataType"):
+        setattr(pymilvus, name, mock.MagicMock(name=name))
+    pymilvus.exceptions = exceptions
+
+    collection = pymilvus.Collection.return_value
+    collection.has_index.return_value = False
+    collection.query_iterator.return_value.next.return_value = []
+    pymilvus.utility.has_collection.return_value = False
+
+    monkeypatch.setitem(sys.modules, "pymilvus", pymilvus)
+    monkeypatch.setitem(sys.modules, "pymilvus.exceptions", exceptions)
+    monkeypatch.delitem(sys.modules, "app.client.user_client", raising=False)
+    monkeypatch.delitem(sys.modules, "app.dao.milvus_clinet", raising=False)
+    return pymilvus
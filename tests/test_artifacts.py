@@ -0,0 +1,51 @@
+import os
+import sys
+import types
+
+import pytest
+
+from app.models import artifacts
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "MODEL_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_cache_path_never_writes_to_bundled_dir(cache_dir):
+    path = artifacts.cache_path(artifacts.FACENET_WEIGHTS)
+    assert os.path.dirname(path) == str(cache_dir)
+
+
+def test_resolve_artifact_verifies_directory_checksums(cache_dir):
+    saved = cache_dir / artifacts.RETINAFACE_SAVED_MODEL
+    (saved / "variables").mkdir(parents=True)
+    (saved / "saved_model.pb").write_bytes(b"graph")
+    (saved / "variables" / "variables.data").write_bytes(b"weights")
+    artifacts.write_checksum(str(saved))
+    assert artifacts.resolve_artifact(artifacts.RETINAFACE_SAVED_MODEL) == str(saved)
+
+    (saved / "variables" / "variables.data").write_bytes(b"tampered")
+    with pytest.raises(ValueError):
+        artifacts.resolve_artifact(artifacts.RETINAFACE_SAVED_MODEL)
+
+
+def test_resolve_artifact_skips_empty_placeholders(cache_dir):
+    (cache_dir / "placeholder.pth").write_bytes(b"")
+    assert artifacts.resolve_artifact("placeholder.pth") is None
+
+
+def test_download_retinaface_weights_caches_with_checksum(cache_dir, monkeypatch):
+    def download(url, output, quiet):
+        with open(output, "wb") as f:
+            f.write(b"h5 weights")
+
+    monkeypatch.setitem(sys.modules, "gdown", types.SimpleNamespace(download=download))
+
+    path = artifacts.download_retinaface_weights()
+
+    assert path == str(cache_dir / artifacts.RETINAFACE_WEIGHTS)
+    assert not os.path.exists(path + ".part")
+    assert artifacts.expected_checksum(path) == artifacts.sha256sum(path)
+    assert artifacts.resolve_artifact(artifacts.RETINAFACE_WEIGHTS) == path
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from app.exceptions import ServiceOverloadedError
+from app.service.batching import MicroBatcher
+
+
+def test_micro_batcher_fails_only_the_item_that_errored():
+    def handler(items):
+        return [ValueError(item) if item == "bad" else item.upper() for item in items]
+
+    batcher = MicroBatcher(handler, max_batch_size=4, max_wait_ms=50)
+    good, bad = batcher.submit("good"), batcher.submit("bad")
+    assert good.result(timeout=1) == "GOOD"
+    with pytest.raises(ValueError):
+        bad.result(timeout=1)
+
+
+def test_micro_batcher_coalesces_concurrent_submits():
+    batches = []
+    release = threading.Event()
+
+    def handler(items):
+        release.wait(1)
+        batches.append(list(items))
+        return items
+
+    batcher = MicroBatcher(handler, max_batch_size=8, max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(5)]
+    release.set()
+    assert [future.result(timeout=1) for future in futures] == list(range(5))
+    assert sum(len(batch) for batch in batches) == 5
+    assert len(batches) < 5
+
+
+def test_micro_batcher_rejects_when_queue_is_full():
+    started = threading.Event()
+    release = threading.Event()
+
+    def handler(items):
+        started.set()
+        release.wait(1)
+        return items
+
+    batcher = MicroBatcher(handler, max_batch_size=1, max_wait_ms=0, max_queue=1)
+    batcher.submit(0)
+    started.wait(1)  # The worker is busy with item 0
+    batcher.submit(1)
+    with pytest.raises(ServiceOverloadedError):
+        batcher.submit(2)
+    release.set()
+
+
+def test_micro_batcher_survives_a_cancelled_caller():
+    started = threading.Event()
+    release = threading.Event()
+    batches = []
+
+    def handler(items):
+        started.set()
+        release.wait(1)
+        batches.append(list(items))
+        return items
+
+    batcher = MicroBatcher(handler, max_batch_size=1, max_wait_ms=0)
+    busy = batcher.submit("busy")
+    started.wait(1)  # The worker is busy, so the next item waits in the queue
+    cancelled = batcher.submit("cancelled")
+    assert cancelled.cancel()  # e.g. the request task was cancelled
+    release.set()
+
+    assert busy.result(timeout=1) == "busy"
+    assert batcher.submit("next").result(timeout=1) == "next"
+    assert batcher._thread.is_alive()
+    assert ["cancelled"] not in batches
+
+
+def test_micro_batcher_survives_a_malformed_handler_result():
+    batcher = MicroBatcher(
+        lambda items: None if items == ["bad"] else items, max_batch_size=1, max_wait_ms=0
+    )
+    with pytest.raises(TypeError):
+        batcher.submit("bad").result(timeout=1)
+    assert batcher.submit("next").result(timeout=1) == "next"
@@ -0,0 +1,45 @@
+import numpy as np
+
+from app.utils import cache_utils
+from app.utils.cache_utils import EmbeddingCache
+
+
+def test_lookup_counts_hits_and_misses():
+    cache = EmbeddingCache()
+    assert cache.lookup("a") == (False, None)
+    cache.put("a", None)  # "No face" is cached too
+    assert cache.lookup("a") == (True, None)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_utils.time, "monotonic", lambda: now[0])
+    cache = EmbeddingCache(ttl_seconds=10)
+    cache.put("a", np.zeros(4))
+    now[0] += 9
+    assert cache.lookup("a")[0]
+    now[0] += 2
+    assert cache.lookup("a") == (False, None)
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
+
+
+def test_byte_limit_evicts_least_recently_used():
+    cache = EmbeddingCache(max_bytes=3 * 512 * 4)
+    for key in "abc":
+        cache.put(key, np.zeros(512, dtype=np.float32))
+    cache.lookup("a")  # Now b is the least recently used
+    cache.put("d", np.zeros(512, dtype=np.float32))
+    assert not cache.lookup("b")[0]
+    assert all(cache.lookup(key)[0] for key in "acd")
+    assert cache.stats()["bytes"] == 3 * 512 * 4
+
+
+def test_entry_limit_and_replacing_a_key():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put("a", np.zeros(2))
+    cache.put("a", np.zeros(4))
+    assert cache.stats()["entries"] == 1 and cache.stats()["bytes"] == 32
+    cache.put("b", None)
+    cache.put("c", None)
+    assert not cache.lookup("a")[0]
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from app.face_recognition.calibration import calibrate_threshold, pair_scores
+
+
+def _embeddings(rng, people=20, photos=3, noise=0.3):
+    centers = rng.normal(size=(people, 512))
+    points = np.repeat(centers, photos, axis=0) + noise * rng.normal(size=(people * photos, 512))
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    return points.astype(np.float32), np.repeat(np.arange(people), photos)
+
+
+def test_pair_scores_split_genuine_and_impostor_pairs():
+    embeddings, labels = _embeddings(np.random.default_rng(0), people=4, photos=2)
+    genuine, impostor = pair_scores(embeddings, labels)
+    assert len(genuine) == 4
+    assert len(impostor) == 8 * 7 // 2 - 4
+    assert genuine.min() > impostor.max()
+
+
+def test_calibrated_threshold_meets_false_accept_target():
+    embeddings, labels = _embeddings(np.random.default_rng(1))
+    report = calibrate_threshold(embeddings, labels, max_false_accept_rate=0.01)
+    assert report["false_accept_rate"] <= 0.01
+    assert report["true_accept_rate"] == 1.0
+
+
+def test_calibration_needs_genuine_and_impostor_pairs():
+    with pytest.raises(ValueError):
+        calibrate_threshold(np.eye(2, 512, dtype=np.float32), np.array(["a", "b"]))
@@ -0,0 +1,52 @@
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from app import dependencies
+from app.factory import registry
+
+
+class SlowService:
+    created = 0
+
+    def __init__(self):
+        SlowService.created += 1
+        time.sleep(0.05)  # Widen the window for racing first requests
+
+
+@pytest.fixture
+def fake_service(monkeypatch):
+    module = types.ModuleType("app.service.user_service")
+    module.UserService = SlowService
+    monkeypatch.setitem(sys.modules, "app.service.user_service", module)
+    monkeypatch.setattr(dependencies, "_user_service", None)
+    monkeypatch.setattr(registry, "error", None)
+    monkeypatch.setattr(registry, "ready", False)
+    SlowService.created = 0
+    return SlowService
+
+
+def test_get_user_service_builds_one_instance_under_concurrency(fake_service):
+    services = []
+    threads = [
+        threading.Thread(target=lambda: services.append(dependencies.get_user_service()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fake_service.created == 1
+    assert all(service is services[0] for service in services)
+
+
+def test_warmup_records_failure(fake_service):
+    # SlowService has no detector, so warmup fails after building the service
+    dependencies.warmup()
+
+    assert isinstance(registry.error, AttributeError)
+    assert not registry.ready
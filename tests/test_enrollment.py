@@ -0,0 +1,99 @@
+import io
+import zipfile
+
+import numpy as np
+import pytest
+
+pytest.importorskip("PIL")
+
+from PIL import Image  # noqa: E402
+
+from app.service.enrollment import EnrollmentPipeline, read_archive  # noqa: E402
+
+RED, GREEN, BLUE = (255, 0, 0), (0, 255, 0), (0, 0, 255)
+
+
+def _png(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class StubDetector:
+    """
+    Red photos make detection fail, blue photos have no face.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def detect_faces(self, image):
+        color = image.getpixel((0, 0))
+        if color == RED:
+            raise RuntimeError("detector failed")
+        return [] if color == BLUE else [((0, 0, 8, 8), 0.99, None)]
+
+    def detect_faces_batch(self, images):
+        self.batches.append(len(images))
+        return [self.detect_faces(image) for image in images]
+
+    def crop_faces(self, image, faces):
+        return np.asarray(image, dtype=np.float32)[None]
+
+
+class StubRecognizer:
+    def generate_embeddings(self, faces):
+        return np.stack([face[0, 0] for face in faces])
+
+
+class StubDb:
+    def __init__(self):
+        self.names = []
+
+    def insert_employees(self, names, embeddings):
+        self.names.extend(names)
+
+
+def _pipeline(detector, db):
+    return EnrollmentPipeline(detector, StubRecognizer(), db, decode_workers=2, batch_size=4)
+
+
+def test_pipeline_detects_in_batches():
+    detector, db = StubDetector(), StubDb()
+    items = [(f"employee-{i}", _png(GREEN)) for i in range(10)]
+
+    result = _pipeline(detector, db).run(items)
+
+    assert result == {"added": 10, "failed": []}
+    assert sorted(db.names) == sorted(name for name, _ in items)
+    assert sum(detector.batches) == 10
+    assert max(detector.batches) <= 4
+
+
+def test_pipeline_isolates_failing_photos():
+    db = StubDb()
+    items = [("a", _png(GREEN)), ("b", _png(RED)), ("c", _png(BLUE)), ("d", b"not an image")]
+
+    result = _pipeline(StubDetector(), db).run(items)
+
+    assert result["added"] == 1
+    assert db.names == ["a"]
+    assert [(failure["index"], failure["name"]) for failure in result["failed"]] == [
+        (1, "b"),
+        (2, "c"),
+        (3, "d"),
+    ]
+    assert result["failed"][0]["error"] == "detector failed"
+
+
+def test_read_archive_streams_from_a_file_object(tmp_path):
+    path = tmp_path / "photos.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("manifest.csv", "filename,name\nx.png,Alice\n")
+        archive.writestr("x.png", _png(GREEN))
+        archive.writestr("unlisted.png", _png(GREEN))
+
+    with open(path, "rb") as file:
+        entries = list(read_archive(file))
+
+    assert entries == [("Alice", _png(GREEN))]
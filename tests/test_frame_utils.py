@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from app.pipeline import DropQueue  # noqa: E402
+from app.utils.frame_utils import FramePool  # noqa: E402
+
+
+def test_pool_reuses_slot_only_after_release():
+    pool = FramePool(depth=2)
+    first, second = pool.frame(), pool.frame()
+    overflow = pool.frame()
+    assert pool.available() == 0
+    assert overflow._pool is None  # Fresh buffers rather than a slot in use
+
+    buffers = first._buffers
+    first.release()
+    first.release()  # Repeated release is a no-op
+    assert pool.available() == 1
+    assert pool.frame()._buffers is buffers
+    assert second._buffers is not buffers
+
+
+def test_views_are_cached_per_frame():
+    pool = FramePool(depth=1)
+    frame = pool.frame(np.zeros((40, 60, 3), dtype=np.uint8))
+    assert frame.rgb is frame.rgb
+    assert frame.downscaled(0.5).shape == (20, 30, 3)
+    assert frame.gray.shape == (40, 60)
+
+
+def test_drop_queue_releases_dropped_items():
+    dropped = []
+    queue = DropQueue(maxsize=1, on_drop=dropped.append)
+    queue.put("a")
+    queue.put("b")
+    assert dropped == ["a"]
+    assert queue.get(timeout=0) == "b"
@@ -0,0 +1,74 @@
+import numpy as np
+
+from app.client.local_index import LocalIndex
+from app.face_recognition.gallery import FaceGallery
+
+
+def _unit_rows(rng, count, dim=8):
+    rows = rng.normal(size=(count, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def test_search_returns_top_k_by_descending_similarity():
+    rng = np.random.default_rng(0)
+    embeddings = _unit_rows(rng, 10)
+    gallery = FaceGallery(dim=8, capacity=2)  # Forces geometric growth
+    gallery.add([f"p{i}" for i in range(10)], embeddings)
+
+    probes = _unit_rows(rng, 3)
+    indices, scores = gallery.search(probes, k=4)
+    expected = np.argsort(-(probes @ embeddings.T), axis=1)[:, :4]
+    np.testing.assert_array_equal(indices, expected)
+    assert np.all(np.diff(scores, axis=1) <= 0)
+
+
+def test_search_caps_k_at_gallery_size():
+    gallery = FaceGallery(dim=8)
+    indices, scores = gallery.search(np.ones(8), k=3)
+    assert indices.shape == scores.shape == (1, 0)
+
+    gallery.add(["a", "b"], np.eye(2, 8))
+    indices, _ = gallery.search(np.ones(8), k=3)
+    assert indices.shape == (1, 2)
+
+
+def test_match_applies_threshold():
+    gallery = FaceGallery(dim=8)
+    gallery.add(["a", "b"], np.eye(2, 8))
+    probes = np.array([[1.0, 0.1] + [0.0] * 6, [1.0, 1.0] + [0.0] * 6])
+    (name, score), (unknown, _) = gallery.match(probes, threshold=0.8)
+    assert name == "a" and score > 0.8
+    assert unknown == "Unknown"
+
+
+def test_remove_compacts_every_entry_for_a_name():
+    gallery = FaceGallery(dim=8)
+    gallery.add(["a", "b", "a", "c"], np.eye(4, 8))
+    gallery.remove("a")
+    assert gallery.names == ["b", "c"]
+    np.testing.assert_array_equal(gallery.embeddings, np.eye(4, 8)[[1, 3]])
+    assert gallery.match(np.eye(4, 8)[[0]])[0][0] == "Unknown"
+
+
+def test_local_index_mirrors_adds_and_removes():
+    index = LocalIndex(dim=8, hnsw_min_size=1000)
+    index.replace(["a", "b"], np.eye(2, 8))
+    index.add(["c"], np.eye(3, 8)[2:])
+    index.remove("a")
+    assert sorted(index.names()) == ["b", "c"]
+
+    names, scores = index.search(np.eye(3, 8)[2:], k=1)
+    assert names[0][0] == "c"
+    assert scores[0][0] > 0.99
+
+
+def test_adopt_uses_array_in_place_until_growth():
+    adopted = np.eye(2, 8, dtype=np.float32)
+    gallery = FaceGallery(dim=8)
+    gallery.adopt(["a", "b"], adopted)
+    assert np.shares_memory(gallery.embeddings, adopted)
+
+    gallery.add(["c"], np.eye(3, 8)[2])
+    assert not np.shares_memory(gallery.embeddings, adopted)
+    assert gallery.names == ["a", "b", "c"]
+    assert gallery.match(np.eye(3, 8)[2])[0][0] == "c"
@@ -0,0 +1,25 @@
+import threading
+
+import pytest
+
+pytest.importorskip("cv2")
+
+from app.pipeline import DropQueue, Stage  # noqa: E402
+
+
+def test_failing_stage_stops_the_pipeline():
+    stop_event = threading.Event()
+    dropped = []
+    in_queue, out_queue = DropQueue(), DropQueue()
+
+    def fail(item):
+        raise RuntimeError("boom")
+
+    stage = Stage("fail", fail, in_queue, out_queue, stop_event, on_drop=dropped.append)
+    stage.start()
+    in_queue.put("item")
+    stage.join(timeout=2)
+
+    assert not stage.is_alive()
+    assert stop_event.is_set()
+    assert dropped == ["item"]
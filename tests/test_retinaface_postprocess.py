@@ -0,0 +1,56 @@
+import numpy as np
+
+from model.retinaface_postprocess import (
+    BASE_ANCHORS,
+    NUM_ANCHORS,
+    anchors_for_feature_maps,
+    anchors_plane,
+    decode_detections,
+    nms,
+)
+
+
+def test_anchors_plane_shifts_base_anchors_row_major():
+    anchors = anchors_plane(2, 3, 8)
+    assert anchors.shape == (2 * 3 * NUM_ANCHORS, 4)
+    np.testing.assert_array_equal(anchors[:NUM_ANCHORS], BASE_ANCHORS[8])
+    # Second cell of the first row is shifted by one stride in x
+    np.testing.assert_array_equal(
+        anchors[NUM_ANCHORS : 2 * NUM_ANCHORS], BASE_ANCHORS[8] + [8, 0, 8, 0]
+    )
+    # First cell of the second row is shifted by one stride in y
+    np.testing.assert_array_equal(
+        anchors[3 * NUM_ANCHORS : 4 * NUM_ANCHORS], BASE_ANCHORS[8] + [0, 8, 0, 8]
+    )
+
+
+def test_anchors_for_feature_maps_are_cached_and_read_only():
+    shapes = ((1, 1), (2, 2), (4, 4))
+    anchors = anchors_for_feature_maps(shapes)
+    assert anchors is anchors_for_feature_maps(shapes)
+    assert len(anchors) == (1 + 4 + 16) * NUM_ANCHORS
+    assert not anchors.flags.writeable
+
+
+def test_nms_drops_overlapping_lower_scores():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [20, 20, 30, 30]], dtype=np.float32)
+    scores = np.array([0.8, 0.9, 0.7], dtype=np.float32)
+    np.testing.assert_array_equal(nms(boxes, scores, 0.4), [1, 2])
+    np.testing.assert_array_equal(nms(boxes, scores, 0.99), [1, 0, 2])
+
+
+def test_decode_detections_keeps_confident_anchor():
+    shapes = ((1, 1), (2, 2), (4, 4))
+    outputs = []
+    for height, width in shapes:
+        outputs.append(np.zeros((1, height, width, 2 * NUM_ANCHORS), dtype=np.float32))
+        outputs.append(np.zeros((1, height, width, 4 * NUM_ANCHORS), dtype=np.float32))
+        outputs.append(np.zeros((1, height, width, 10 * NUM_ANCHORS), dtype=np.float32))
+    # Face probability of the second stride-8 anchor in cell (1, 2)
+    outputs[6][0, 1, 2, NUM_ANCHORS + 1] = 0.95
+
+    ((boxes, scores, landmarks),) = decode_detections(outputs, threshold=0.9, scale=0.5)
+    np.testing.assert_allclose(scores, [0.95])
+    # Zero deltas decode to the anchor itself, mapped back through the scale
+    np.testing.assert_allclose(boxes, [(BASE_ANCHORS[8][1] + [16, 8, 16, 8]) / 0.5])
+    assert landmarks.shape == (1, 5, 2)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from app.scheduler import MESH, RECOGNIZE, SKIP, MotionScheduler  # noqa: E402
+
+
+def _scheduler(**kwargs):
+    options = dict(
+        thumbnail_size=64,
+        pixel_delta=10,
+        motion_threshold=0.01,
+        scene_change_threshold=0.1,
+        min_recognition_interval=2,
+        max_recognition_interval=100,
+        max_mesh_interval=5,
+    )
+    options.update(kwargs)
+    return MotionScheduler(**options)
+
+
+def test_static_scene_is_skipped_with_periodic_mesh():
+    scheduler = _scheduler()
+    frame = np.full((120, 160, 3), 80, dtype=np.uint8)
+    decisions = [scheduler.decide(frame) for _ in range(7)]
+    assert decisions == [RECOGNIZE, SKIP, SKIP, SKIP, SKIP, MESH, SKIP]
+
+
+def test_motion_triggers_mesh_and_scene_change_recognition():
+    scheduler = _scheduler()
+    frame = np.full((120, 160, 3), 80, dtype=np.uint8)
+    scheduler.decide(frame)
+
+    moved = frame.copy()
+    moved[40:60, 60:80] = 200  # Small moving patch
+    assert scheduler.decide(moved) == MESH
+
+    changed = np.full_like(frame, 200)  # Lights on: the whole scene changed
+    assert scheduler.decide(changed) == RECOGNIZE
+
+
+def test_recognition_forced_after_max_interval():
+    scheduler = _scheduler(max_recognition_interval=3, max_mesh_interval=100)
+    frame = np.full((120, 160, 3), 80, dtype=np.uint8)
+    assert [scheduler.decide(frame) for _ in range(4)] == [RECOGNIZE, SKIP, SKIP, RECOGNIZE]
+    assert scheduler.counts == {SKIP: 2, MESH: 0, RECOGNIZE: 2}
+
+
+def test_resolution_change_triggers_recognition():
+    scheduler = _scheduler()
+    frame = np.full((120, 160, 3), 80, dtype=np.uint8)
+    assert [scheduler.decide(frame) for _ in range(3)] == [RECOGNIZE, SKIP, SKIP]
+
+    # Same thumbnail size and content, but the camera switched resolution
+    larger = np.full((240, 320, 3), 80, dtype=np.uint8)
+    assert scheduler.decide(larger) == RECOGNIZE
+    assert scheduler.counts == {SKIP: 2, MESH: 0, RECOGNIZE: 2}
@@ -0,0 +1,96 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from app.face_recognition.gallery import FaceGallery
+from app.face_recognition.snapshot import (
+    EMBEDDINGS_FILE,
+    META_FILE,
+    NAMES_FILE,
+    GallerySnapshot,
+    photo_sources,
+)
+
+
+def test_append_creates_then_extends_snapshot(tmp_path):
+    snapshot = GallerySnapshot(str(tmp_path), dim=4)
+    snapshot.append(["a"], [[2.0, 0, 0, 0]])
+    snapshot.append(["b", "c"], np.eye(3, 4)[1:])
+
+    names, embeddings = snapshot.load()
+    assert names == ["a", "b", "c"]
+    np.testing.assert_allclose(embeddings, np.eye(3, 4))  # Normalized on write
+
+
+def test_load_ignores_and_append_drops_interrupted_tail(tmp_path):
+    snapshot = GallerySnapshot(str(tmp_path), dim=4)
+    snapshot.save(["a"], np.eye(1, 4))
+    # A crash after writing rows and names but before updating meta.json
+    with open(tmp_path / EMBEDDINGS_FILE, "ab") as f:
+        f.write(np.ones(6, dtype="<f4").tobytes())
+    with open(tmp_path / NAMES_FILE, "a", encoding="utf-8") as f:
+        f.write("partial\nmore")
+
+    assert snapshot.load()[0] == ["a"]
+    snapshot.append(["b"], np.eye(2, 4)[1:])
+    names, embeddings = snapshot.load()
+    assert names == ["a", "b"]
+    np.testing.assert_allclose(embeddings, np.eye(2, 4))
+    assert os.path.getsize(tmp_path / EMBEDDINGS_FILE) == 2 * 4 * 4
+
+
+def test_load_is_copy_on_write(tmp_path):
+    snapshot = GallerySnapshot(str(tmp_path), dim=4)
+    snapshot.save(["a"], np.eye(1, 4))
+    _, embeddings = snapshot.load()
+    embeddings[0] = 0
+    np.testing.assert_allclose(snapshot.load()[1], np.eye(1, 4))
+
+
+def test_rejects_unknown_version_and_mismatched_dim(tmp_path):
+    GallerySnapshot(str(tmp_path), dim=4).save(["a"], np.eye(1, 4))
+    with pytest.raises(ValueError):
+        GallerySnapshot(str(tmp_path), dim=8).load()
+
+    with open(tmp_path / META_FILE, "w", encoding="utf-8") as f:
+        json.dump({"version": 99, "dim": 4, "count": 1}, f)
+    with pytest.raises(ValueError):
+        GallerySnapshot(str(tmp_path), dim=4).load()
+
+
+def test_rejects_names_with_newlines(tmp_path):
+    with pytest.raises(ValueError):
+        GallerySnapshot(str(tmp_path), dim=4).save(["a\nb"], np.eye(1, 4))
+
+
+def test_save_over_the_mapped_snapshot(tmp_path):
+    snapshot = GallerySnapshot(str(tmp_path), dim=4)
+    snapshot.save(["a", "b", "c"], np.eye(3, 4))
+    gallery = FaceGallery(dim=4)
+    gallery.adopt(*snapshot.load())
+    gallery.remove("a")
+
+    # Rewrites the files that `gallery` still maps
+    snapshot.save(gallery.names, gallery.embeddings)
+
+    names, embeddings = snapshot.load()
+    assert names == ["b", "c"]
+    np.testing.assert_allclose(embeddings, np.eye(3, 4)[1:])
+    np.testing.assert_allclose(gallery.embeddings, np.eye(3, 4)[1:])
+    assert sorted(os.listdir(tmp_path)) == [EMBEDDINGS_FILE, META_FILE, NAMES_FILE]
+
+
+def test_sources_survive_append_and_track_photo_changes(tmp_path):
+    photo = tmp_path / "a.jpg"
+    photo.write_bytes(b"jpeg")
+    sources = photo_sources([str(photo)], ["a"])
+    snapshot = GallerySnapshot(str(tmp_path / "gallery"), dim=4)
+    snapshot.save(["a"], np.eye(1, 4), sources)
+    snapshot.append(["b"], np.eye(2, 4)[1:])
+    assert snapshot.read_meta()["sources"] == sources
+
+    os.utime(photo, ns=(0, 0))
+    assert photo_sources([str(photo)], ["a"]) != sources
+    assert photo_sources([str(photo)], ["renamed"]) != sources
@@ -0,0 +1,44 @@
+import numpy as np
+
+from app.face_recognition.tracking import FaceTracker, iou_matrix
+
+
+def test_iou_matrix():
+    ious = iou_matrix([[0, 0, 10, 10]], [[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]])
+    np.testing.assert_allclose(ious, [[1.0, 1 / 3, 0.0]], atol=1e-6)
+
+
+def test_tracks_follow_moving_faces():
+    tracker = FaceTracker(iou_threshold=0.3, max_missed=2)
+    first = tracker.update([[0, 0, 10, 10], [50, 50, 60, 60]])
+    # Same faces, slightly moved and listed in the other order
+    second = tracker.update([[51, 50, 61, 60], [1, 0, 11, 10]])
+    assert [track.id for track in second] == [first[1].id, first[0].id]
+    assert len(tracker.tracks) == 2
+
+
+def test_new_face_starts_track_and_lost_face_expires():
+    tracker = FaceTracker(iou_threshold=0.3, max_missed=1)
+    (lost,) = tracker.update([[0, 0, 10, 10]])
+    (new,) = tracker.update([[100, 100, 110, 110]])
+    assert new.id != lost.id
+    tracker.update([[100, 100, 110, 110]])
+    assert tracker.tracks == [new]
+
+
+def test_needs_recognition_schedule():
+    tracker = FaceTracker(reverify_interval=10, min_confidence=0.7, low_confidence_interval=3)
+    (track,) = tracker.update([[0, 0, 10, 10]])
+    assert tracker.needs_recognition(track)
+
+    tracker.set_identity(track, "alice", 0.9)
+    for _ in range(9):
+        tracker.update([[0, 0, 10, 10]])
+        assert not tracker.needs_recognition(track)
+    tracker.update([[0, 0, 10, 10]])
+    assert tracker.needs_recognition(track)
+
+    tracker.set_identity(track, "alice", 0.6)  # Weak match: re-check sooner
+    for _ in range(3):
+        tracker.update([[0, 0, 10, 10]])
+    assert tracker.needs_recognition(track)
@@ -0,0 +1,132 @@
+import threading
+
+import numpy as np
+import pytest
+
+
+def test_user_client_creates_indexes_and_loads_collection(fake_pymilvus):
+    from app.client.user_client import UserClient
+
+    client = UserClient()
+
+    collection = fake_pymilvus.Collection.return_value
+    assert client.collection is collection
+    collection.create_index.assert_called_once()
+    collection.load.assert_called_once()
+    assert client.local_synced
+
+
+def test_user_client_falls_back_to_exported_gallery_without_milvus(
+    fake_pymilvus, monkeypatch, tmp_path
+):
+    import app.client.user_client as user_client
+    from app.face_recognition.snapshot import GallerySnapshot
+
+    embeddings = np.eye(2, 512, dtype=np.float32)
+    GallerySnapshot(str(tmp_path)).save(["alice", "bob"], embeddings)
+    monkeypatch.setattr(user_client, "MILVUS_EXPORT_DIR", str(tmp_path))
+    fake_pymilvus.connections.connect.side_effect = fake_pymilvus.exceptions.MilvusException("down")
+    client = user_client.UserClient()
+    assert client.collection is None
+    assert client.local_seeded
+
+    matches = client.search_employees(embeddings[::-1].tolist())
+    assert [match["name"] for match in matches] == ["bob", "alice"]
+
+
+def test_user_client_refuses_to_search_an_unseeded_mirror(fake_pymilvus, monkeypatch):
+    import app.client.user_client as user_client
+    from app.exceptions import StoreUnavailableError
+
+    monkeypatch.setattr(user_client, "MILVUS_EXPORT_DIR", "/nonexistent")
+    fake_pymilvus.connections.connect.side_effect = fake_pymilvus.exceptions.MilvusException("down")
+    client = user_client.UserClient()
+
+    with pytest.raises(StoreUnavailableError):
+        client.search_employees([[1.0] * 512])
+    with pytest.raises(StoreUnavailableError):
+        client.list_employees()
+
+
+def test_user_client_without_local_index_reports_unavailable(fake_pymilvus, monkeypatch):
+    import app.client.user_client as user_client
+    from app.exceptions import StoreUnavailableError
+
+    monkeypatch.setattr(user_client, "LOCAL_INDEX_ENABLED", False)
+    fake_pymilvus.connections.connect.side_effect = fake_pymilvus.exceptions.MilvusException("down")
+    client = user_client.UserClient()
+
+    with pytest.raises(StoreUnavailableError):
+        client.search_employees([[1.0] * 512])
+
+    # Also when the connection drops during a search
+    fake_pymilvus.connections.connect.side_effect = None
+    client = user_client.UserClient()
+    collection = fake_pymilvus.Collection.return_value
+    collection.search.side_effect = fake_pymilvus.exceptions.MilvusException("lost")
+    with pytest.raises(StoreUnavailableError):
+        client.search_employees([[1.0] * 512])
+    assert client.collection is None
+
+
+def test_user_client_reconnects_in_the_background(fake_pymilvus, monkeypatch):
+    import app.client.user_client as user_client
+    from app.exceptions import StoreUnavailableError
+
+    monkeypatch.setattr(user_client, "MILVUS_EXPORT_DIR", "/nonexistent")
+    monkeypatch.setattr(user_client, "MILVUS_RECONNECT_SECONDS", 0)
+    fake_pymilvus.connections.connect.side_effect = fake_pymilvus.exceptions.MilvusException("down")
+    client = user_client.UserClient()
+
+    milvus_back = threading.Event()
+    fake_pymilvus.connections.connect.side_effect = lambda **kwargs: milvus_back.wait(5)
+    # The search answers (with 503) without waiting for the slow reconnect
+    with pytest.raises(StoreUnavailableError):
+        client.search_employees([[1.0] * 512])
+    assert client._reconnect_thread.is_alive()
+    milvus_back.set()
+    client._reconnect_thread.join(timeout=5)
+
+    assert client.collection is fake_pymilvus.Collection.return_value
+    assert client.local_synced
+
+
+def test_user_client_searches_milvus_while_available(fake_pymilvus):
+    from app.client.user_client import UserClient
+
+    client = UserClient()
+    collection = fake_pymilvus.Collection.return_value
+    hit = type("Hit", (), {"distance": 0.9, "entity": {"name": "alice"}})()
+    collection.search.return_value = [[hit]]
+
+    assert client.search_employees([[1.0] * 512]) == [{"name": "alice", "distance": 0.9}]
+    collection.search.assert_called_once()
+
+
+def test_user_client_resyncs_local_index_when_serving_small_galleries(fake_pymilvus, monkeypatch):
+    import app.client.user_client as user_client
+
+    monkeypatch.setattr(user_client, "LOCAL_INDEX_SERVE_SMALL", True)
+    monkeypatch.setattr(user_client, "LOCAL_INDEX_RESYNC_SECONDS", 0)
+    client = user_client.UserClient()
+    collection = fake_pymilvus.Collection.return_value
+    # Another worker enrolled "bob" after this client connected
+    collection.query_iterator.return_value.next.side_effect = [
+        [{"name": "bob", "embedding": [1.0] + [0.0] * 511}],
+        [],
+    ]
+
+    assert client.search_employees([[1.0] + [0.0] * 511])[0]["name"] == "bob"
+    collection.search.assert_not_called()
+
+
+def test_milvus_client_indexes_existing_collection_before_loading(fake_pymilvus):
+    from app.dao.milvus_clinet import MilvusClient
+
+    fake_pymilvus.utility.has_collection.return_value = True
+    collection = fake_pymilvus.Collection.return_value
+
+    MilvusClient("faces")
+
+    calls = [call[0] for call in collection.method_calls]
+    assert calls.index("create_index") < calls.index("load")
@@ -0,0 +1,100 @@
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("mediapipe")  # Imported by app.face_recognition.detection
+
+from PIL import Image  # noqa: E402
+
+RED, GREEN, BLUE, WHITE = (255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)
+
+
+def _image(color):
+    return Image.new("RGB", (8, 8), color)
+
+
+class StubDetector:
+    """
+    Red images make detection fail, blue images have no face.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def detect_faces(self, image):
+        self.calls += 1
+        color = image.getpixel((0, 0))
+        if color == RED:
+            raise RuntimeError("detector failed")
+        return [] if color == BLUE else [(0, 0, 8, 8)]
+
+    def detect_faces_batch(self, images):
+        return [self.detect_faces(image) for image in images]
+
+    def crop_faces(self, image, boxes):
+        return [np.asarray(image, dtype=np.float32)]
+
+
+class StubRecognizer:
+    def generate_embeddings(self, faces):
+        return np.stack([face[0, 0] for face in faces])
+
+
+class StubDb:
+    def __init__(self, error=None):
+        self.error = error
+        self.searches = []
+
+    def search_employees(self, embeddings):
+        self.searches.append(embeddings)
+        if self.error is not None:
+            raise self.error
+        return [{"name": f"employee-{int(np.argmax(e))}", "distance": 0.9} for e in embeddings]
+
+
+@pytest.fixture
+def service(fake_pymilvus, monkeypatch):
+    monkeypatch.delitem(sys.modules, "app.service.user_service", raising=False)
+    import app.service.user_service as user_service
+
+    monkeypatch.setattr(user_service, "UserClient", StubDb)
+    monkeypatch.setattr(user_service, "FaceDetector", StubDetector)
+    monkeypatch.setattr(user_service, "FaceRecognizer", StubRecognizer)
+    return user_service.UserService()
+
+
+def test_search_employees_isolates_the_failing_image(service):
+    results = service.search_employees([_image(GREEN), _image(RED), _image(BLUE), _image(WHITE)])
+
+    assert results[0] == {"name": "employee-1", "distance": 0.9}
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == {"name": "No face detected", "distance": None}
+    assert results[3]["name"] == "employee-0"
+    assert len(service.db.searches) == 1  # Still one batched search
+
+
+def test_search_employees_fails_only_searched_images_when_db_fails(service):
+    service.db.error = ConnectionError("milvus down")
+    results = service.search_employees([_image(GREEN), _image(BLUE)])
+
+    assert results[0] is service.db.error
+    assert results[1] == {"name": "No face detected", "distance": None}
+
+
+def test_submit_search_fails_only_the_failing_caller(service):
+    good, bad = service.submit_search(_image(GREEN)), service.submit_search(_image(RED))
+
+    assert good.result(timeout=1)["name"] == "employee-1"
+    with pytest.raises(RuntimeError):
+        bad.result(timeout=1)
+
+
+def test_cached_embeddings_skip_detection(service):
+    service.search_employees([_image(GREEN)])
+    calls = service.detector.calls
+
+    assert service.search_employees([_image(GREEN)])[0]["name"] == "employee-1"
+    assert service.detector.calls == calls
+    assert service.cache_stats()["hits"] == 1